@@ -0,0 +1,49 @@
+import io
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import Lexer
+from parser import Parser
+from runner import Runner
+from symbolizer import Symbolizer
+
+VALUES = {'integer': '7', 'real': '7 / 2', 'boolean': '1 < 2', 'char': "'x'"}
+
+PROGRAM = '''var a: array[1..{n}] of {type_}; i: integer;
+begin
+    i := {n};
+    a[i] := {value};
+    writeln(a[i]);
+end.
+'''
+
+
+def measure(type_, n):
+    source = PROGRAM.format(n=n, type_=type_, value=VALUES[type_])
+    ast = Parser(Lexer(source).lex()).parse()
+    Symbolizer(ast).symbolize()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        Runner(ast).run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print('{:>8} {:>10} {:>12} {:>10}'.format('type', 'elements', 'peak [MB]', 'time [ms]'))
+    for type_ in VALUES:
+        peak, elapsed = measure(type_, n)
+        print('{:>8} {:>10} {:>12.2f} {:>10.2f}'.format(type_, n, peak / 2 ** 20, elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import Generator
+from lexer import RegexLexer
+from parser import Parser
+from programs import generate
+from runner import Runner
+from symbolizer import Symbolizer
+
+
+def build(text):
+    tokens = RegexLexer(text).lex()
+    tracemalloc.start()
+    ast = Parser(tokens).parse()
+    Symbolizer(ast).symbolize()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ast, size
+
+
+def timed(fun):
+    start = time.perf_counter()
+    fun()
+    return time.perf_counter() - start
+
+
+def run(ast):
+    with contextlib.redirect_stdout(io.StringIO()):
+        Runner(ast).run()
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [2000, 10000, 50000]
+    print('{:>8} {:>12} {:>10} {:>12} {:>14}'.format('lines', 'AST [MB]', 'run [s]', 'generate [s]', 'ASTs / GB'))
+    with tempfile.TemporaryDirectory() as root:
+        for lines in sizes:
+            ast, size = build(generate(lines))
+            ran = timed(lambda: run(ast))
+            generated = timed(lambda: Generator(ast).generate(os.path.join(root, 'gen.c')))
+            print('{:>8} {:>12.2f} {:>10.3f} {:>12.3f} {:>14.0f}'.format(
+                lines, size / 2 ** 20, ran, generated, 2 ** 30 / size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import Lexer
+from parser import Parser
+from runner import Runner
+from symbolizer import Symbol, Symbolizer
+
+PROGRAMS = {
+    'while': '''var i, s: integer;
+begin
+    i := 0;
+    s := 0;
+    while i < {n} do
+    begin
+        s := s + i;
+        i := i + 1;
+    end;
+    writeln(s);
+end.
+''',
+    'if': '''var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        if i mod 2 = 0 then
+        begin
+            s := s + i;
+        end
+        else
+        begin
+            s := s - 1;
+        end;
+    end;
+    writeln(s);
+end.
+''',
+    'decl': '''var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        integer t;
+        t := i * 2;
+        s := s + t;
+    end;
+    writeln(s);
+end.
+''',
+    'call': '''function twice(x: integer): integer;
+    begin
+        exit(x * 2);
+    end;
+
+var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        s := s + twice(i);
+    end;
+    writeln(s);
+end.
+''',
+}
+
+
+class Counter:
+    def __init__(self):
+        self.copies = 0
+        self.copy = Symbol.copy
+
+    def __enter__(self):
+        counter = self
+
+        def copy(symbol):
+            counter.copies += 1
+            return counter.copy(symbol)
+
+        Symbol.copy = copy
+        return self
+
+    def __exit__(self, *args):
+        Symbol.copy = self.copy
+
+
+def measure(source):
+    ast = Parser(Lexer(source).lex()).parse()
+    Symbolizer(ast).symbolize()
+    with Counter() as counter, redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        Runner(ast).run()
+        elapsed = time.perf_counter() - start
+    return counter.copies, elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print('{:>8} {:>10} {:>14} {:>12}'.format('program', 'iterations', 'symbol copies', 'time [ms]'))
+    for name, program in PROGRAMS.items():
+        copies, elapsed = measure(program.replace('{n}', str(n)))
+        print('{:>8} {:>10} {:>14} {:>12.2f}'.format(name, n, copies, elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import Cache
+from programs import generate
+
+
+def load(cache, path):
+    start = time.perf_counter()
+    with open(path) as source:
+        cache.load(source)
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [100, 1000, 10000]
+    print('{:>8} {:>12} {:>12} {:>8}'.format('lines', 'miss [ms]', 'hit [ms]', 'speedup'))
+    with tempfile.TemporaryDirectory() as root:
+        cache = Cache(os.path.join(root, 'cache'))
+        for lines in sizes:
+            path = os.path.join(root, '{}.pas'.format(lines))
+            with open(path, 'w') as source:
+                source.write(generate(lines))
+            miss = load(cache, path)
+            hit = min(load(cache, path) for _ in range(5))
+            print('{:>8} {:>12.2f} {:>12.2f} {:>8.1f}'.format(lines, miss * 1e3, hit * 1e3, miss / hit))
+        print('hits: {}, misses: {}'.format(cache.hits, cache.misses))
+
+
+if __name__ == '__main__':
+    main()
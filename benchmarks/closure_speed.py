@@ -0,0 +1,103 @@
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closures import Closures
+from console import Console
+from lexer import Lexer
+from parser import Parser
+from runner import Runner
+from symbolizer import Symbolizer
+
+KERNELS = {
+    'sum': '''var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        s := s + i * 2 - 1;
+    end;
+    writeln(s);
+end.
+''',
+    'while': '''var i, s: integer;
+begin
+    i := 0;
+    s := 0;
+    while i < {n} do
+    begin
+        if i mod 3 = 0 then
+        begin
+            s := s + i;
+        end;
+        i := i + 1;
+    end;
+    writeln(s);
+end.
+''',
+    'array': '''var i, s: integer; a: array[1..{n}] of integer;
+begin
+    for i := 1 to {n} do
+    begin
+        a[i] := i;
+    end;
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        s := s + a[i];
+    end;
+    writeln(s);
+end.
+''',
+    'nested': '''var i, j, s: integer;
+begin
+    s := 0;
+    for i := 1 to {m} do
+    begin
+        for j := 1 to {m} do
+        begin
+            s := s + (i * j) mod 7;
+        end;
+    end;
+    writeln(s);
+end.
+''',
+}
+
+
+def parse(source):
+    ast = Parser(Lexer(source).lex()).parse()
+    Symbolizer(ast).symbolize()
+    return ast
+
+
+def measure(engine, source):
+    ast = parse(source)
+    output = io.StringIO()
+    start = time.perf_counter()
+    if engine is Closures:
+        engine(ast, Console(stdout=output)).run()
+    else:
+        with redirect_stdout(output):
+            engine(ast).run()
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print('{:>8} {:>12} {:>12} {:>8}'.format('kernel', 'runner [ms]', 'closures [ms]', 'speedup'))
+    for name, kernel in KERNELS.items():
+        source = kernel.replace('{n}', str(n)).replace('{m}', str(int(n ** 0.5)))
+        runner, expected = measure(Runner, source)
+        closures, output = measure(Closures, source)
+        if output != expected:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        print('{:>8} {:>12.2f} {:>12.2f} {:>8.1f}'.format(name, runner * 1e3, closures * 1e3, runner / closures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import parse
+from console import Console
+from runner import Runner
+from vm import VM, Compiler
+
+ACKERMANN = '''function ack(m, n: integer): integer;
+begin
+    if m = 0 then
+    begin
+        exit(n + 1);
+    end;
+    if n = 0 then
+    begin
+        exit(ack(m - 1, 1));
+    end;
+    exit(ack(m - 1, ack(m, n - 1)));
+end;
+var r: integer;
+begin
+    r := ack({m}, {n});
+    writeln(r);
+end.
+'''
+
+DFS = '''function dfs(v, n: integer): integer;
+var c: integer;
+begin
+    if v > n then
+    begin
+        exit(0);
+    end;
+    c := 1 + dfs(v + 1, n);
+    if v mod 100 = 0 then
+    begin
+        c := c + dfs(n + 1, n);
+    end;
+    exit(c);
+end;
+var r: integer;
+begin
+    r := dfs(1, {n});
+    writeln(r);
+end.
+'''
+
+
+def runner(source):
+    ast = parse(source)
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            Runner(ast).run()
+    except SystemExit:
+        return None, None
+    return time.perf_counter() - start, output.getvalue()
+
+
+def stackless(source):
+    bytecode = Compiler(parse(source)).compile()
+    output = io.StringIO()
+    start = time.perf_counter()
+    VM(bytecode, Console(stdout=output)).run()
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    cases = [
+        ('ack(2, 50)', ACKERMANN.replace('{m}', '2').replace('{n}', '50')),
+        ('ack(3, 6)', ACKERMANN.replace('{m}', '3').replace('{n}', '6')),
+        ('ack(3, 7)', ACKERMANN.replace('{m}', '3').replace('{n}', '7')),
+        ('dfs(100)', DFS.replace('{n}', '100')),
+        ('dfs(1e4)', DFS.replace('{n}', '10000')),
+        ('dfs(1e5)', DFS.replace('{n}', '100000')),
+    ]
+    print('{:>12} {:>10} {:>12} {:>12}'.format('case', 'result', 'runner [ms]', 'vm [ms]'))
+    for name, source in cases:
+        vm, output = stackless(source)
+        interpreted, expected = runner(source)
+        if expected is not None and expected != output:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        shown = 'overflow' if interpreted is None else '{:.2f}'.format(interpreted * 1e3)
+        print('{:>12} {:>10} {:>12} {:>12.2f}'.format(name, output.strip(), shown, vm * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import RegexLexer
+from parser import Parser
+from programs import expressions
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print('{:>6} {:>10} {:>10} {:>14}'.format('depth', 'tokens', 'parse [s]', 'tokens / s'))
+    for depth in [1, 2, 3, 4]:
+        tokens = RegexLexer(expressions(lines, depth=depth)).lex()
+        count = len(tokens)
+        start = time.perf_counter()
+        Parser(tokens).parse()
+        elapsed = time.perf_counter() - start
+        print('{:>6} {:>10} {:>10.3f} {:>14.0f}'.format(depth, count, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from incremental import Incremental
+from programs import generate
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    print('{:>8} {:>12} {:>12} {:>10}'.format('lines', 'full [ms]', 'edit [ms]', 'reused'))
+    for lines in sizes:
+        text = generate(lines)
+        start = time.perf_counter()
+        document = Incremental(text)
+        full = time.perf_counter() - start
+
+        line = text.index('\t\ts := a * ', len(text) // 4)
+        digit = line + len('\t\ts := a * ')
+        edits = 20
+        start = time.perf_counter()
+        for i in range(edits):
+            document.edit(digit, digit + 1, str(i % 9 + 1))
+        edit = (time.perf_counter() - start) / edits
+        print('{:>8} {:>12.1f} {:>12.2f} {:>10}'.format(lines, full * 1e3, edit * 1e3, document.reused))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import Lexer, RegexLexer
+from programs import generate
+
+
+def throughput(lexer, text, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = lexer(text).lex()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(tokens), best
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = generate(lines)
+    print('{:>12} {:>10} {:>10} {:>14}'.format('lexer', 'tokens', 'time [s]', 'tokens / s'))
+    for lexer in [Lexer, RegexLexer]:
+        tokens, elapsed = throughput(lexer, text)
+        print('{:>12} {:>10} {:>10.3f} {:>14.0f}'.format(lexer.__name__, tokens, elapsed, tokens / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import parse
+from console import Console
+from optimizer import Optimizer
+from runner import Runner
+
+KERNELS = {
+    'bound': '''var i, n, s: integer;
+begin
+    n := {n};
+    s := 0;
+    for i := 1 to n * 2 - n do
+    begin
+        s := s + i;
+    end;
+    writeln(s);
+end.
+''',
+    'while': '''var i, n, k, s: integer;
+begin
+    n := {n};
+    k := 7;
+    i := 0;
+    s := 0;
+    while i < n * 2 - n do
+    begin
+        s := s + (k * k + 3) mod 5 + i;
+        i := i + 1;
+    end;
+    writeln(s);
+end.
+''',
+    'nested': '''var i, j, m, s: integer;
+begin
+    m := {m};
+    s := 0;
+    for i := 1 to m do
+    begin
+        for j := 1 to m do
+        begin
+            s := s + (i * i + m) mod 7 + j;
+        end;
+    end;
+    writeln(s);
+end.
+''',
+    # n and k come from readln, which assigns them before the loop
+    'read': '''var i, n, k, s: integer;
+begin
+    readln(n, k);
+    s := 0;
+    for i := 1 to n do
+    begin
+        s := s + (k * k + 3) mod 5 + i;
+    end;
+    writeln(s);
+end.
+''',
+    # k is only assigned when the loop runs, so k * 2 must not be evaluated in front of it
+    'empty': '''var i, n, k, s: integer;
+begin
+    n := {n} - {n};
+    s := 0;
+    if n > 0 then
+    begin
+        k := 3;
+    end;
+    for i := 1 to n do
+    begin
+        s := s + k * 2;
+    end;
+    writeln(s);
+end.
+''',
+}
+
+HOISTED = {'bound': 1, 'while': 2, 'nested': 1, 'read': 1, 'empty': 0}
+
+
+def measure(source, hoist, stdin):
+    ast = parse(source)
+    optimizer = Optimizer(ast, hoist)
+    optimizer.optimize()
+    output = io.StringIO()
+    start = time.perf_counter()
+    Runner(ast, Console(io.StringIO(stdin), output)).run()
+    return time.perf_counter() - start, output.getvalue(), optimizer.hoisted
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print('{:>8} {:>8} {:>10} {:>10} {:>8}'.format('kernel', 'hoisted', 'off [ms]', 'on [ms]', 'speedup'))
+    for name, kernel in KERNELS.items():
+        source = kernel.replace('{n}', str(n)).replace('{m}', str(int(n ** 0.5)))
+        stdin = '{} 7\n'.format(n)
+        off, expected, _ = measure(source, False, stdin)
+        on, output, hoisted = measure(source, True, stdin)
+        if output != expected:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        if hoisted != HOISTED[name]:
+            raise SystemExit('{}: hoisted {} expressions, expected {}'.format(name, hoisted, HOISTED[name]))
+        print('{:>8} {:>8} {:>10.2f} {:>10.2f} {:>8.1f}'.format(name, hoisted, off * 1e3, on * 1e3, off / on))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import parse
+from console import Console
+from runner import Runner
+
+FIB = '''function fib(n: integer): integer;
+begin
+    if n < 2 then
+    begin
+        exit(n);
+    end;
+    exit(fib(n - 1) + fib(n - 2));
+end;
+var r: integer;
+begin
+    r := fib({n});
+    writeln(r);
+end.
+'''
+
+BINOMIAL = '''function binom(n, k: integer): integer;
+begin
+    if (k = 0) or (k = n) then
+    begin
+        exit(1);
+    end;
+    exit(binom(n - 1, k - 1) + binom(n - 1, k));
+end;
+var r: integer;
+begin
+    r := binom({n}, {k});
+    writeln(r);
+end.
+'''
+
+PATHS = '''function paths(x, y: integer): integer;
+begin
+    if (x = 0) or (y = 0) then
+    begin
+        exit(1);
+    end;
+    exit(paths(x - 1, y) + paths(x, y - 1));
+end;
+var r: integer;
+begin
+    r := paths({n}, {n});
+    writeln(r);
+end.
+'''
+
+# g(2) and g(4 / 2) must not share an entry: the first prints 4, the second 4.0
+MIXED = '''function g(x: real): real;
+begin
+    exit(x * 2);
+end;
+var a: real;
+begin
+    writeln(g(2));
+    a := 4 / 2;
+    writeln(g(a));
+end.
+'''
+
+
+def measure(source, memo):
+    ast = parse(source)
+    output = io.StringIO()
+    runner = Runner(ast, Console(stdout=output), memo)
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start, output.getvalue(), runner.memo.stats()
+
+
+def main():
+    small = [
+        ('fib(20)', FIB.replace('{n}', '20')),
+        ('binom(18,9)', BINOMIAL.replace('{n}', '18').replace('{k}', '9')),
+        ('paths(9)', PATHS.replace('{n}', '9')),
+        ('g(2),g(a)', MIXED),
+    ]
+    print('{:>12} {:>10} {:>10} {:>10} {:>8} {:>8}'.format('case', 'result', 'off [ms]', 'on [ms]', 'speedup', 'hits'))
+    for name, source in small:
+        off, expected, _ = measure(source, 0)
+        on, output, stats = measure(source, 1 << 16)
+        if output != expected:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        print('{:>12} {:>10} {:>10.2f} {:>10.2f} {:>8.1f} {:>7.1%}'.format(
+            name, ' '.join(output.split()), off * 1e3, on * 1e3, off / on, stats['rate']))
+
+    large = [
+        ('fib(60)', FIB.replace('{n}', '60')),
+        ('binom(60,30)', BINOMIAL.replace('{n}', '60').replace('{k}', '30')),
+        ('paths(40)', PATHS.replace('{n}', '40')),
+    ]
+    print()
+    print('{:>12} {:>22} {:>10} {:>8} {:>8}'.format('case', 'result', 'on [ms]', 'entries', 'hits'))
+    for name, source in large:
+        on, output, stats = measure(source, 1 << 16)
+        print('{:>12} {:>22} {:>10.2f} {:>8} {:>7.1%}'.format(name, output.strip(), on * 1e3, stats['entries'], stats['rate']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import parse
+from console import Console
+from native import Native
+from runner import Runner
+
+KERNELS = {
+    'sieve': '''function sieve(n: integer): integer;
+var p: array[1..4000] of integer; i, j, c: integer;
+begin
+    c := 0;
+    for i := 2 to n do
+    begin
+        if p[i] = 0 then
+        begin
+            c := c + 1;
+            j := i * i;
+            while j <= n do
+            begin
+                p[j] := 1;
+                j := j + i;
+            end;
+        end;
+    end;
+    exit(c);
+end;
+var r: integer;
+begin
+    r := sieve({n});
+    writeln(r);
+end.
+''',
+    'collatz': '''function steps(n: integer): integer;
+var c: integer;
+begin
+    c := 0;
+    while n <> 1 do
+    begin
+        if n mod 2 = 0 then
+        begin
+            n := n div 2;
+        end
+        else
+        begin
+            n := 3 * n + 1;
+        end;
+        c := c + 1;
+    end;
+    exit(c);
+end;
+function longest(n: integer): integer;
+var i, best, s: integer;
+begin
+    best := 0;
+    for i := 1 to n do
+    begin
+        s := steps(i);
+        if s > best then
+        begin
+            best := s;
+        end;
+    end;
+    exit(best);
+end;
+var r: integer;
+begin
+    r := longest({n});
+    writeln(r);
+end.
+''',
+    'gcd': '''function gcd(a, b: integer): integer;
+var t: integer;
+begin
+    while b <> 0 do
+    begin
+        t := a mod b;
+        a := b;
+        b := t;
+    end;
+    exit(a);
+end;
+function total(n: integer): integer;
+var i, j, s: integer;
+begin
+    s := 0;
+    for i := 1 to n do
+    begin
+        for j := 1 to n do
+        begin
+            s := s + gcd(i, j);
+        end;
+    end;
+    exit(s);
+end;
+var r: integer;
+begin
+    r := total({n});
+    writeln(r);
+end.
+''',
+}
+
+SIZES = {'sieve': 4000, 'collatz': 3000, 'gcd': 120}
+
+# Pure integer functions the Runner gives its own loop semantics, so they must stay interpreted
+FALLBACKS = {
+    'break': '''function f(n: integer): integer;
+var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to n do
+    begin
+        s := s + 10;
+        if i = 6 then
+        begin
+            break;
+        end;
+    end;
+    exit(s);
+end;
+var r: integer;
+begin
+    r := f(10);
+    writeln(r);
+end.
+''',
+    'continue': '''function g(n: integer): integer;
+var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to n do
+    begin
+        continue;
+        s := s + 1;
+    end;
+    exit(s);
+end;
+var r: integer;
+begin
+    r := g(10);
+    writeln(r);
+end.
+''',
+}
+
+
+def measure(ast, native):
+    output = io.StringIO()
+    start = time.perf_counter()
+    Runner(ast, Console(stdout=output), native=native).run()
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        print('{:>8} {:>12} {:>12} {:>12} {:>12} {:>8}'.format(
+            'kernel', 'runner [ms]', 'build [ms]', 'cached [ms]', 'native [ms]', 'speedup'))
+        for name, kernel in KERNELS.items():
+            ast = parse(kernel.replace('{n}', str(SIZES[name])))
+            start = time.perf_counter()
+            routines = Native(ast, root=root).build()
+            build = time.perf_counter() - start
+            if not routines:
+                raise SystemExit('{}: nothing was compiled, is a C compiler on PATH?'.format(name))
+            start = time.perf_counter()
+            Native(ast, root=root).build()
+            cached = time.perf_counter() - start
+            Native(ast).build()
+            interpreted, expected = measure(ast, False)
+            native, output = measure(ast, True)
+            if output != expected:
+                raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+            print('{:>8} {:>12.2f} {:>12.2f} {:>12.2f} {:>12.2f} {:>8.1f}'.format(
+                name, interpreted * 1e3, build * 1e3, cached * 1e3, native * 1e3, interpreted / native))
+
+        print()
+        for name, source in FALLBACKS.items():
+            ast = parse(source)
+            routines = Native(ast, root=root).build()
+            _, expected = measure(ast, False)
+            _, output = measure(ast, True)
+            if routines or output != expected:
+                raise SystemExit('{}: native tier changed the result {!r} != {!r}'.format(name, output, expected))
+            print('{:>8} interpreted, output {!r}'.format(name, output))
+
+
+if __name__ == '__main__':
+    main()
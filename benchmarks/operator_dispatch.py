@@ -0,0 +1,115 @@
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import parse
+from console import Console
+from runner import Runner
+from symbolizer import Symbol
+
+KERNELS = {
+    'arithmetic': '''var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        s := s + i * 3 - i div 2 + i mod 7;
+    end;
+    writeln(s);
+end.
+''',
+    'compare': '''var i, c: integer;
+begin
+    c := 0;
+    for i := 1 to {n} do
+    begin
+        if (i mod 3 = 0) or (i mod 5 = 0) and (i >= 10) then
+        begin
+            c := c + 1;
+        end;
+    end;
+    writeln(c);
+end.
+''',
+    'guard': '''var i, c, z: integer;
+begin
+    c := 0;
+    z := 0;
+    for i := 1 to {n} do
+    begin
+        if (z <> 0) and (i div z > 1) then
+        begin
+            c := c + 1;
+        end;
+    end;
+    writeln(c);
+end.
+''',
+}
+
+
+class Chained(Runner):
+    # The string comparison chain the Runner used before operators were resolved at parse time
+    def visit_BinOp(self, parent, node):
+        first = self.visit(node, node.first)
+        if isinstance(first, Symbol):
+            first = first.value
+        second = self.visit(node, node.second)
+        if isinstance(second, Symbol):
+            second = second.value
+        if node.symbol == '+':
+            return first + second
+        elif node.symbol == '-':
+            return first - second
+        elif node.symbol == '*':
+            return first * second
+        elif node.symbol == '/':
+            return first / second
+        elif node.symbol == 'div':
+            return int(first) // int(second) if second else 0
+        elif node.symbol == 'mod':
+            return first % second
+        elif node.symbol == '=':
+            return first == second
+        elif node.symbol == '<>':
+            return first != second
+        elif node.symbol == '<':
+            return first < second
+        elif node.symbol == '>':
+            return first > second
+        elif node.symbol == '<=':
+            return first <= second
+        elif node.symbol == '>=':
+            return first >= second
+        elif node.symbol == 'and':
+            return first != 0 and second != 0
+        elif node.symbol == 'or':
+            return first != 0 or second != 0
+
+
+def measure(engine, source):
+    ast = parse(source)
+    output = io.StringIO()
+    runner = engine(ast, Console(stdout=output), vectorize=False)
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print('{:>12} {:>12} {:>12} {:>8}'.format('kernel', 'chain [ms]', 'table [ms]', 'speedup'))
+    for name, kernel in KERNELS.items():
+        source = kernel.replace('{n}', str(n))
+        chained, expected = measure(Chained, source)
+        table, output = measure(Runner, source)
+        if output != expected:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        print('{:>12} {:>12.2f} {:>12.2f} {:>8.2f}'.format(name, chained * 1e3, table * 1e3, chained / table))
+
+
+if __name__ == '__main__':
+    main()
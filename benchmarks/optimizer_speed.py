@@ -0,0 +1,107 @@
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import parse
+from generator import Generator
+from optimizer import Optimizer
+from runner import Runner
+
+KERNELS = {
+    'fold': '''var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        s := s + i * (60 * 60) div (2 * 30) - (10 mod 3) + ord('a') - 97;
+    end;
+    writeln(s);
+end.
+''',
+    'identity': '''var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        s := (s + i * 1 + 0) div 1 - 0;
+    end;
+    writeln(s);
+end.
+''',
+    'dead': '''var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        if 1 > 2 then
+        begin
+            s := s - i;
+        end
+        else
+        begin
+            s := s + i;
+        end;
+        while false do
+        begin
+            s := 0;
+        end;
+    end;
+    writeln(s);
+end.
+''',
+    'continue': '''var i, s: integer;
+begin
+    s := 0;
+    for i := 1 to {n} do
+    begin
+        continue;
+        s := s + 1;
+    end;
+    writeln(s);
+end.
+''',
+}
+
+
+def measure(source, optimize):
+    ast = parse(source)
+    optimizer = Optimizer(ast)
+    if optimize:
+        optimizer.optimize()
+    output = io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(output):
+        Runner(ast).run()
+    return time.perf_counter() - start, output.getvalue(), optimizer
+
+
+def generated(source, optimize):
+    ast = parse(source)
+    if optimize:
+        Optimizer(ast).optimize()
+    generator = Generator(ast)
+    generator.visit(None, ast)
+    return len(generator.py)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print('{:>9} {:>8} {:>8} {:>10} {:>10} {:>8} {:>10}'.format(
+        'kernel', 'folded', 'removed', 'off [ms]', 'on [ms]', 'speedup', 'C [chars]'))
+    for name, kernel in KERNELS.items():
+        source = kernel.replace('{n}', str(n))
+        off, expected, _ = measure(source, False)
+        on, output, optimizer = measure(source, True)
+        if output != expected:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        size = '{}->{}'.format(generated(source, False), generated(source, True))
+        print('{:>9} {:>8} {:>8} {:>10.2f} {:>10.2f} {:>8.1f} {:>10}'.format(
+            name, optimizer.folded, optimizer.removed, off * 1e3, on * 1e3, off / on, size))
+
+
+if __name__ == '__main__':
+    main()
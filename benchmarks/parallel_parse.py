@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel
+from programs import generate
+
+
+def timed(fun, *args, **kwargs):
+    start = time.perf_counter()
+    fun(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    text = generate(lines)
+    serial = timed(parallel.serial, text)
+    print('{} lines, {} CPUs'.format(lines, os.cpu_count()))
+    print('{:>8} {:>10} {:>8}'.format('workers', 'time [s]', 'speedup'))
+    print('{:>8} {:>10.3f} {:>8.2f}'.format('serial', serial, 1.0))
+    workers = 2
+    while workers <= max(2, os.cpu_count()):
+        elapsed = timed(parallel.parse, text, workers)
+        print('{:>8} {:>10.3f} {:>8.2f}'.format(workers, elapsed, serial / elapsed))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
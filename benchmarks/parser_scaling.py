@@ -0,0 +1,29 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import Lexer
+from parser import Parser
+from programs import generate
+
+
+def measure(lines):
+    text = generate(lines)
+    tokens = Lexer(text).lex()
+    start = time.perf_counter()
+    Parser(tokens).parse()
+    return len(tokens), time.perf_counter() - start
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    print('{:>8} {:>10} {:>10} {:>14}'.format('lines', 'tokens', 'parse [s]', 'us / token'))
+    for lines in sizes:
+        tokens, elapsed = measure(lines)
+        print('{:>8} {:>10} {:>10.3f} {:>14.3f}'.format(lines, tokens, elapsed, elapsed / tokens * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+import random
+
+
+def routine(rng, index):
+    lines = [
+        'procedure p{}(a, b: integer);'.format(index),
+        '\tvar',
+        '\t\ti, s: integer;',
+        '',
+        '\tbegin',
+        '\t\ts := a * {} + b;'.format(rng.randint(1, 9)),
+        '\t\tfor i := 1 to b do',
+        '\t\tbegin',
+        '\t\t\tif s mod {} = 0 then'.format(rng.randint(2, 9)),
+        '\t\t\tbegin',
+        '\t\t\t\ts := s div 2 + i;',
+        '\t\t\tend',
+        '\t\t\telse',
+        '\t\t\tbegin',
+        '\t\t\t\ts := s - (i * {});'.format(rng.randint(1, 9)),
+        '\t\t\tend;',
+        '\t\tend;',
+        '\t\twriteln(s);',
+        '\tend;',
+        '',
+    ]
+    return lines
+
+
+def generate(lines, seed=0):
+    rng = random.Random(seed)
+    out = []
+    count = 0
+    while len(out) < lines // 2:
+        out.extend(routine(rng, count))
+        count += 1
+
+    out.extend(['var', '\tx, y: integer;', '', 'begin', '\tx := 0;', '\ty := 1;'])
+    i = 0
+    while len(out) < lines - 1:
+        if i % 5 == 4:
+            out.append('\tp{}(x, {});'.format(rng.randrange(count), rng.randint(1, 5)))
+        else:
+            out.append('\tx := x + {} * (y - {});'.format(rng.randint(1, 99), rng.randint(1, 99)))
+        i += 1
+    out.append('end.')
+    return '\n'.join(out)
+
+
+def operand(rng, depth):
+    choice = rng.randrange(6 if depth > 0 else 3)
+    if choice == 0:
+        return str(rng.randint(1, 99))
+    elif choice in [1, 2]:
+        return rng.choice(['x', 'y', 'z'])
+    elif choice == 3:
+        return 'f({})'.format(arithmetic(rng, depth - 1))
+    elif choice == 4:
+        return '-({})'.format(arithmetic(rng, depth - 1))
+    return '({})'.format(arithmetic(rng, depth - 1))
+
+
+def arithmetic(rng, depth):
+    ops = ['+', '-', '*', 'div', 'mod']
+    out = operand(rng, depth)
+    for _ in range(rng.randint(1, 4)):
+        out += ' {} {}'.format(rng.choice(ops), operand(rng, depth))
+    return out
+
+
+def comparison(rng, depth):
+    first = rng.choice(['x', 'y', 'z', 'f({})'.format(arithmetic(rng, depth - 1))])
+    return '{} {} {}'.format(first, rng.choice(['=', '<>', '<', '>', '<=', '>=']), arithmetic(rng, depth))
+
+
+def expressions(lines, seed=0, depth=3):
+    rng = random.Random(seed)
+    out = [
+        'function f(a: integer): integer;',
+        '\tbegin',
+        '\t\texit(a mod 7 + 1);',
+        '\tend;',
+        '',
+        'var',
+        '\tx, y, z: integer;',
+        '\tb: boolean;',
+        '',
+        'begin',
+        '\tx := 1;',
+        '\ty := 2;',
+        '\tz := 3;',
+    ]
+    while len(out) < lines - 1:
+        kind = rng.randrange(3)
+        if kind == 0:
+            out.append('\t{} := {};'.format(rng.choice(['x', 'y', 'z']), arithmetic(rng, depth)))
+        elif kind == 1:
+            out.append('\tb := {};'.format(comparison(rng, depth)))
+        else:
+            out.append('\tif ({}) and ({}) or not b then begin x := x + 1; end;'.format(
+                comparison(rng, depth), comparison(rng, depth)))
+    out.append('end.')
+    return '\n'.join(out)
+
+
+def nesting(lines, seed=0, depth=24):
+    rng = random.Random(seed)
+    out = ['var', '\ti, j, k: integer;', '', 'begin', '\ti := 0;', '\tj := 0;', '\tk := 0;']
+    while len(out) < lines - 1:
+        closing = []
+        for level in range(1, depth + 1):
+            pad = '\t' * level
+            kind = rng.randrange(3)
+            if kind == 0:
+                out.append('{}if i < {} then'.format(pad, rng.randint(1, 99)))
+            elif kind == 1:
+                out.append('{}while j > {} do'.format(pad, rng.randint(1, 99)))
+            else:
+                out.append('{}for k := 1 to {} do'.format(pad, rng.randint(1, 9)))
+            out.append(pad + 'begin')
+            out.append('{}\ti := i + {};'.format(pad, rng.randint(1, 9)))
+            closing.append(pad + 'end;')
+        out.extend(reversed(closing))
+    out.append('end.')
+    return '\n'.join(out)
+
+
+def long_expressions(lines, seed=0, width=200):
+    rng = random.Random(seed)
+    ops = ['+', '-', '*', 'div', 'mod']
+    out = ['var', '\tx, y, z: integer;', '', 'begin', '\tx := 1;', '\ty := 2;', '\tz := 3;']
+    while len(out) < lines - 1:
+        terms = [rng.choice(['x', 'y', 'z', str(rng.randint(1, 99))]) for _ in range(width)]
+        line = '\t{} := {}'.format(rng.choice(['x', 'y', 'z']), terms[0])
+        for i, term in enumerate(terms[1:]):
+            if i % 10 == 9:
+                out.append(line)
+                line = '\t\t'
+            else:
+                line += ' '
+            line += '{} {}'.format(rng.choice(ops), term)
+        out.append(line + ';')
+    out.append('end.')
+    return '\n'.join(out)
+
+
+def function(rng, index):
+    return [
+        'function f{}(n: integer): integer;'.format(index),
+        '\tbegin',
+        '\t\tif n <= 1 then',
+        '\t\tbegin',
+        '\t\t\texit(1);',
+        '\t\tend;',
+        '\t\texit(n * {} + f{}(n - 1));'.format(rng.randint(1, 9), index),
+        '\tend;',
+        '',
+    ]
+
+
+def routines(lines, seed=0):
+    rng = random.Random(seed)
+    out = []
+    count = 0
+    while len(out) < lines - 8:
+        if count % 2 == 0:
+            out.extend(routine(rng, count))
+        else:
+            out.extend(function(rng, count))
+        count += 1
+    out.extend(['var', '\tx: integer;', '', 'begin', '\tx := 1;', '\tp0(x, 2);', 'end.'])
+    return '\n'.join(out)
+
+
+def variables(lines, seed=0):
+    rng = random.Random(seed)
+    out = ['var']
+    count = 0
+    while len(out) < lines - 4:
+        if rng.randrange(4) == 0:
+            out.append('\ta{}: array[1..{}] of integer;'.format(count, rng.randint(1, 100)))
+            count += 1
+        else:
+            names = ['v{}'.format(count + i) for i in range(8)]
+            type_ = rng.choice(['integer', 'real', 'char', 'boolean'])
+            out.append('\t{}: {};'.format(', '.join(names), type_))
+            count += 8
+    out.extend(['', 'begin', '\tv1 := 1;', 'end.'])
+    return '\n'.join(out)
+
+
+def arrays(lines, seed=0, length=64, width=16):
+    rng = random.Random(seed)
+    out = ['var']
+    count = 0
+    while len(out) < lines - 4:
+        out.append('\ta{}: array[1..{}] of integer = ('.format(count, length))
+        values = [str(rng.randint(0, 999)) for _ in range(length)]
+        for i in range(0, length, width):
+            tail = ',' if i + width < length else ''
+            out.append('\t\t' + ', '.join(values[i:i + width]) + tail)
+        out.append('\t);')
+        count += 1
+    out.extend(['', 'begin', '\twriteln(a0[1]);', 'end.'])
+    return '\n'.join(out)
+
+
+SHAPES = {
+    'nesting': nesting,
+    'expressions': long_expressions,
+    'routines': routines,
+    'variables': variables,
+    'arrays': arrays,
+}
+
+
+def synthetic(shape, lines, seed=0):
+    return SHAPES[shape](lines, seed)
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import parse
+from console import Console
+from runner import Runner
+
+WRITE = '''var i: integer;
+begin
+    for i := 1 to {n} do
+    begin
+        writeln(i);
+    end;
+end.
+'''
+
+def measure(source, data, limit):
+    ast = parse(source)
+    with tempfile.TemporaryFile('w+') as stdin, open(os.devnull, 'w') as stdout:
+        stdin.write(data)
+        stdin.seek(0)
+        start = time.perf_counter()
+        Runner(ast, Console(stdin, stdout, limit)).run()
+        return time.perf_counter() - start
+
+
+def tokenize(data, bulk):
+    with tempfile.TemporaryFile('w+') as stdin, open(os.devnull, 'w') as stdout:
+        stdin.write(data)
+        stdin.seek(0)
+        console = Console(stdin, stdout)
+        read = console.tokens if bulk else lambda: input().split()
+        streams = sys.stdin, sys.stdout
+        sys.stdin, sys.stdout = stdin, stdout
+        start = time.perf_counter()
+        try:
+            while True:
+                read()
+        except EOFError:
+            pass
+        finally:
+            sys.stdin, sys.stdout = streams
+        return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    data = ''.join('{}\n'.format(i) for i in range(n))
+    print('{:>8} {:>16} {:>16} {:>8}'.format('kernel', 'unbuffered [ms]', 'buffered [ms]', 'speedup'))
+    source = WRITE.replace('{n}', str(n))
+    unbuffered = measure(source, data, 1)
+    buffered = measure(source, data, 1 << 16)
+    print('{:>8} {:>16.2f} {:>16.2f} {:>8.1f}'.format('write', unbuffered * 1e3, buffered * 1e3, unbuffered / buffered))
+
+    lines = tokenize(data, False)
+    blocks = tokenize(data, True)
+    print()
+    print('{:>8} {:>16} {:>16}'.format('lines', 'input() [ms]', 'blocks [ms]'))
+    print('{:>8} {:>16.2f} {:>16.2f}'.format(n, lines * 1e3, blocks * 1e3))
+
+
+if __name__ == '__main__':
+    main()
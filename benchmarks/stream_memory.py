@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import Class, RegexLexer
+from parser import Lookahead, Parser
+from programs import generate
+
+
+def drain(tokens):
+    window = Lookahead(tokens)
+    i = 0
+    while window[i].class_ != Class.EOF:
+        i += 1
+    return i
+
+
+def peak(fun, *args):
+    tracemalloc.start()
+    fun(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def whole(path):
+    with open(path) as source:
+        return Parser(RegexLexer(source.read()).lex()).parse()
+
+
+def streamed(path):
+    with open(path) as source:
+        return Parser(RegexLexer.stream(source)).parse()
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 50000, 200000]
+    print('{:>8} {:>10} {:>14} {:>14} {:>14} {:>14}'.format(
+        'lines', 'file [MB]', 'lex() [MB]', 'stream [MB]', 'parse [MB]', 'streamed [MB]'))
+    for lines in sizes:
+        with tempfile.NamedTemporaryFile('w', suffix='.pas', delete=False) as f:
+            f.write(generate(lines))
+            path = f.name
+        try:
+            with open(path) as source:
+                listed = peak(lambda: drain(RegexLexer(source.read()).lex()))
+            with open(path) as source:
+                stream = peak(drain, RegexLexer.stream(source))
+            print('{:>8} {:>10.1f} {:>14.1f} {:>14.1f} {:>14.1f} {:>14.1f}'.format(
+                lines, os.path.getsize(path) / 2 ** 20, listed, stream, peak(whole, path), peak(streamed, path)))
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
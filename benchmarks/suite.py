@@ -0,0 +1,80 @@
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import Generator
+from lexer import Lexer, RegexLexer
+from parser import Parser
+from programs import SHAPES, synthetic
+from symbolizer import Symbolizer
+
+SIZES = [1000, 4000, 16000]
+SUPER_LINEAR = 1.4
+
+
+def timed(fun):
+    start = time.perf_counter()
+    result = fun()
+    return result, time.perf_counter() - start
+
+
+def phases(text, path):
+    _, lexed = timed(lambda: Lexer(text).lex())
+    tokens, regex = timed(lambda: RegexLexer(text).lex())
+    ast, parsed = timed(lambda: Parser(tokens).parse())
+    _, symbolized = timed(lambda: Symbolizer(ast).symbolize())
+    _, generated = timed(lambda: Generator(ast).generate(path))
+    return len(tokens), {
+        'Lexer.lex': lexed,
+        'RegexLexer.lex': regex,
+        'Parser.parse': parsed,
+        'Symbolizer.symbolize': symbolized,
+        'Generator.generate': generated,
+    }
+
+
+def growth(sizes, times):
+    # Least-squares slope of log(time) over log(size); 1.0 is linear.
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+
+
+def main():
+    shapes = [a for a in sys.argv[1:] if a in SHAPES] or list(SHAPES)
+    sizes = [int(a) for a in sys.argv[1:] if a.isdigit()] or SIZES
+    flagged = []
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'gen.c')
+        for shape in shapes:
+            counts, results = [], []
+            for lines in sizes:
+                count, result = phases(synthetic(shape, lines), path)
+                counts.append(count)
+                results.append(result)
+
+            print('{} ({})'.format(shape, ', '.join('{} tokens'.format(c) for c in counts)))
+            for phase in results[0]:
+                times = [r[phase] for r in results]
+                slope = growth(counts, times)
+                flag = slope > SUPER_LINEAR
+                if flag:
+                    flagged.append((shape, phase, slope))
+                print('  {:<22} {}  growth {:.2f}{}'.format(
+                    phase, ' '.join('{:>8.1f}ms'.format(t * 1e3) for t in times), slope,
+                    '  SUPER-LINEAR' if flag else ''))
+
+    if flagged:
+        print('\nsuper-linear phases:')
+        for shape, phase, slope in flagged:
+            print('  {} / {}: growth {:.2f}'.format(shape, phase, slope))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
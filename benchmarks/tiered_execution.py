@@ -0,0 +1,50 @@
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import KERNELS, parse
+from console import Console
+from memoization import FIB
+from runner import Runner
+from tiering import THRESHOLD
+
+CASES = dict(KERNELS, fib=FIB)
+
+
+def measure(source, threshold):
+    ast = parse(source)
+    output = io.StringIO()
+    runner = Runner(ast, Console(stdout=output), memo=0, vectorize=False, threshold=threshold)
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start, output.getvalue(), runner.tiering
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threshold = int(sys.argv[2]) if len(sys.argv) > 2 else THRESHOLD
+    print('{:>8} {:>12} {:>12} {:>8}  {}'.format('kernel', 'ast [ms]', 'tiered [ms]', 'speedup', 'tier-ups'))
+    for name, kernel in CASES.items():
+        size = 20 if name == 'fib' else n
+        source = kernel.replace('{n}', str(size)).replace('{m}', str(int(size ** 0.5)))
+        walked, expected, _ = measure(source, None)
+        tiered, output, tiering = measure(source, threshold)
+        if output != expected:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        events = ', '.join('{}@{}'.format(label, heat) for label, heat in tiering.events)
+        print('{:>8} {:>12.2f} {:>12.2f} {:>8.1f}  {}'.format(name, walked * 1e3, tiered * 1e3, walked / tiered, events))
+
+    print()
+    print('short runs stay on the AST walker:')
+    for size in [10, 100, 1000]:
+        source = KERNELS['sum'].replace('{n}', str(size))
+        walked, _, _ = measure(source, None)
+        tiered, _, tiering = measure(source, threshold)
+        print('{:>8} {:>12.3f} {:>12.3f} {:>8.2f}  {}'.format(size, walked * 1e3, tiered * 1e3, walked / tiered, tiering.counts()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import RegexLexer
+from parser import Parser
+from programs import generate
+
+
+def allocated(fun):
+    tracemalloc.start()
+    result = fun()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def parse_time(tokens):
+    start = time.perf_counter()
+    Parser(tokens).parse()
+    return time.perf_counter() - start
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = generate(lines)
+    lexer = RegexLexer(text)
+    tokens, listed = allocated(lexer.lex)
+    compact, packed = allocated(lexer.compact)
+    count = len(tokens)
+    print('{} tokens from {} lines'.format(count, lines))
+    print('{:>12} {:>14} {:>14} {:>12}'.format('stream', 'bytes', 'bytes / token', 'parse [s]'))
+    print('{:>12} {:>14} {:>14.1f} {:>12.3f}'.format('Token list', listed, listed / count, parse_time(tokens)))
+    print('{:>12} {:>14} {:>14.1f} {:>12.3f}'.format('TokenArray', packed, packed / count, parse_time(compact)))
+
+
+if __name__ == '__main__':
+    main()
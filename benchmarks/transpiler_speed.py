@@ -0,0 +1,59 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import Cache
+from closure_speed import KERNELS, measure, parse
+from closures import Closures
+from console import Console
+from programs import generate
+from runner import Runner
+from transpiler import Transpiler, execute
+
+
+def transpiled(source):
+    ast = parse(source)
+    output = io.StringIO()
+    start = time.perf_counter()
+    execute(Transpiler(ast).compile(), Console(stdout=output))
+    return time.perf_counter() - start, output.getvalue()
+
+
+def code(cache, path):
+    start = time.perf_counter()
+    with open(path) as source:
+        cache.code(source)
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print('{:>8} {:>12} {:>14} {:>12} {:>8}'.format('kernel', 'runner [ms]', 'closures [ms]', 'python [ms]', 'speedup'))
+    for name, kernel in KERNELS.items():
+        source = kernel.replace('{n}', str(n)).replace('{m}', str(int(n ** 0.5)))
+        runner, expected = measure(Runner, source)
+        closures, _ = measure(Closures, source)
+        python, output = transpiled(source)
+        if output != expected:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        print('{:>8} {:>12.2f} {:>14.2f} {:>12.2f} {:>8.1f}'.format(name, runner * 1e3, closures * 1e3, python * 1e3, runner / python))
+
+    print()
+    print('{:>8} {:>16} {:>16}'.format('lines', 'generate [ms]', 'marshal [ms]'))
+    with tempfile.TemporaryDirectory() as root:
+        cache = Cache(os.path.join(root, 'cache'))
+        for lines in [100, 1000, 10000]:
+            path = os.path.join(root, '{}.pas'.format(lines))
+            with open(path, 'w') as source:
+                source.write(generate(lines))
+            miss = code(cache, path)
+            hit = min(code(cache, path) for _ in range(5))
+            print('{:>8} {:>16.2f} {:>16.2f}'.format(lines, miss * 1e3, hit * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import Lexer
+from parser import Parser
+from runner import Runner
+from symbolizer import Symbolizer
+
+LOOP = '''for i := 1 to {n} do
+begin
+    s := s + i;
+end;
+'''
+
+
+def nested(depth, n):
+    body = LOOP.format(n=n)
+    for _ in range(depth):
+        body = 'if 1 = 1 then\nbegin\n' + body + 'end;\n'
+    return 'var i, s: integer;\nbegin\ns := 0;\n' + body + 'writeln(s);\nend.\n'
+
+
+def recursive(depth, n):
+    return '''function f(d: integer): integer;
+    var
+        i, s: integer;
+    begin
+        s := 0;
+        if d > 0 then
+        begin
+            exit(f(d - 1));
+        end;
+        ''' + LOOP.format(n=n) + '''        exit(s);
+    end;
+
+begin
+    writeln(f(''' + str(depth) + '''));
+end.
+'''
+
+
+def measure(source, n, repeat=3):
+    ast = Parser(Lexer(source).lex()).parse()
+    Symbolizer(ast).symbolize()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            Runner(ast).run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print('{:>6} {:>16} {:>16}'.format('depth', 'nested [us/it]', 'recursive [us/it]'))
+    for depth in range(5):
+        print('{:>6} {:>16.2f} {:>16.2f}'.format(depth, measure(nested(depth, n), n) * 1e6,
+                                               measure(recursive(depth, n), n) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
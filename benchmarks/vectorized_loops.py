@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import parse
+from console import Console
+from runner import Runner
+from vectorizer import AVAILABLE
+
+SETUP = '''var i, k, s, c, m: integer; a: array[1..{n}] of integer; b: array[1..{n}] of integer; d: array[1..{n}] of integer;
+begin
+    k := 3;
+    for i := 1 to {n} do
+    begin
+        b[i] := i mod 1000;
+        d[i] := i mod 7;
+    end;
+{body}
+end.
+'''
+
+KERNELS = {
+    'map': '''    for i := 1 to {n} do
+    begin
+        a[i] := b[i] * k + d[i];
+    end;
+    writeln(a[{n}]);''',
+    'sum': '''    s := 0;
+    for i := 1 to {n} do
+    begin
+        s := s + b[i] * d[i];
+    end;
+    writeln(s);''',
+    'count': '''    c := 0;
+    for i := 1 to {n} do
+    begin
+        if b[i] > 500 then
+        begin
+            c := c + 1;
+        end;
+    end;
+    writeln(c);''',
+    'max': '''    m := 0;
+    for i := 1 to {n} do
+    begin
+        if b[i] - d[i] > m then
+        begin
+            m := b[i] - d[i];
+        end;
+    end;
+    writeln(m);''',
+}
+
+
+def measure(source, vectorize):
+    ast = parse(source)
+    output = io.StringIO()
+    runner = Runner(ast, Console(stdout=output), vectorize=vectorize)
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    if not AVAILABLE:
+        raise SystemExit('NumPy is not installed, the Runner uses the scalar path only')
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print('{:>8} {:>12} {:>12} {:>8}'.format('kernel', 'scalar [ms]', 'numpy [ms]', 'speedup'))
+    for name, body in KERNELS.items():
+        source = SETUP.replace('{body}', body).replace('{n}', str(n))
+        scalar, expected = measure(source, False)
+        vector, output = measure(source, True)
+        if output != expected:
+            raise SystemExit('{}: output mismatch {!r} != {!r}'.format(name, output, expected))
+        print('{:>8} {:>12.2f} {:>12.2f} {:>8.1f}'.format(name, scalar * 1e3, vector * 1e3, scalar / vector))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closure_speed import KERNELS, parse
+from console import Console
+from runner import Runner
+from vm import Compiler, VM
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS = os.path.join(ROOT, 'Tests')
+
+
+def run_runner(source, data):
+    ast = parse(source)
+    output = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(data)
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            Runner(ast).run()
+    finally:
+        sys.stdin = stdin
+    return time.perf_counter() - start, output.getvalue()
+
+
+def run_vm(source, data):
+    ast = parse(source)
+    output = io.StringIO()
+    start = time.perf_counter()
+    VM(Compiler(ast).compile(), Console(io.StringIO(data), output)).run()
+    return time.perf_counter() - start, output.getvalue()
+
+
+def compare(name, source, data=''):
+    runner, expected = run_runner(source, data)
+    vm, output = run_vm(source, data)
+    status = '' if output.strip() == expected.strip() else '  (output differs)'
+    print('{:>8} {:>12.2f} {:>12.2f} {:>8.1f}{}'.format(name, runner * 1e3, vm * 1e3, runner / vm, status))
+
+
+def main():
+    sys.setrecursionlimit(10000)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print('{:>8} {:>12} {:>12} {:>8}'.format('program', 'runner [ms]', 'vm [ms]', 'speedup'))
+    for test in sorted(os.listdir(TESTS)):
+        with open(os.path.join(TESTS, test, 'src.pas')) as f:
+            source = f.read()
+        with open(os.path.join(TESTS, test, '1.in')) as f:
+            data = f.read()
+        compare('test ' + test, source, data)
+    for name, kernel in KERNELS.items():
+        compare(name, kernel.replace('{n}', str(n)).replace('{m}', str(int(n ** 0.5))))
+
+
+if __name__ == '__main__':
+    main()
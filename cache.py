@@ -0,0 +1,134 @@
+from lexer import RegexLexer
+from parser import Parser
+from symbolizer import Symbolizer
+from transpiler import Transpiler
+import hashlib
+import importlib.util
+import marshal
+import os
+import pickle
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ROOT, '.cache')
+CACHE_LIMIT = 64 * 2 ** 20
+CHUNK_SIZE = 1 << 16
+FRONT_END = ['lexer.py', 'operators.py', 'parser.py', 'symbolizer.py']
+BACK_END = ['runtime.py', 'transpiler.py']
+FORMATS = {
+    '.ast': (pickle.load, lambda value, entry: pickle.dump(value, entry, pickle.HIGHEST_PROTOCOL)),
+    '.code': (marshal.load, marshal.dump),
+}
+
+
+def version(names, salt=b''):
+    digest = hashlib.sha256(salt)
+    for name in names:
+        with open(os.path.join(ROOT, name), 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+VERSION = version(FRONT_END)
+CODE_VERSION = version(FRONT_END + BACK_END, importlib.util.MAGIC_NUMBER)
+
+
+class Cache:
+    def __init__(self, root=CACHE_DIR, limit=CACHE_LIMIT):
+        self.root = root
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, source, version=VERSION):
+        digest = hashlib.sha256(version.encode())
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), ''):
+            digest.update(chunk.encode())
+        source.seek(0)
+        return digest.hexdigest()
+
+    def path(self, key, suffix='.ast'):
+        return os.path.join(self.root, key + suffix)
+
+    def get(self, key, suffix='.ast'):
+        path = self.path(key, suffix)
+        load, _ = FORMATS[suffix]
+        try:
+            with open(path, 'rb') as entry:
+                value = load(entry)
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            self.misses += 1
+            self.count('misses')
+            return None
+        os.utime(path)
+        self.hits += 1
+        self.count('hits')
+        return value
+
+    def put(self, key, value, suffix='.ast'):
+        _, dump = FORMATS[suffix]
+        fd, temp = tempfile.mkstemp(dir=self.root)
+        try:
+            with os.fdopen(fd, 'wb') as entry:
+                dump(value, entry)
+            os.replace(temp, self.path(key, suffix))
+        except BaseException:
+            os.remove(temp)
+            raise
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(tuple(FORMATS)):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def count(self, name):
+        path = os.path.join(self.root, name)
+        try:
+            with open(path) as counter:
+                value = int(counter.read() or 0)
+        except (OSError, ValueError):
+            value = 0
+        with open(path, 'w') as counter:
+            counter.write(str(value + 1))
+
+    def stats(self):
+        stats = {}
+        for name in ['hits', 'misses']:
+            try:
+                with open(os.path.join(self.root, name)) as counter:
+                    stats[name] = int(counter.read() or 0)
+            except (OSError, ValueError):
+                stats[name] = 0
+        return stats
+
+    def load(self, source):
+        key = self.key(source)
+        ast = self.get(key)
+        if ast is None:
+            ast = Parser(RegexLexer.stream(source)).parse()
+            Symbolizer(ast).symbolize()
+            self.put(key, ast)
+        return ast
+
+    def code(self, source):
+        key = self.key(source, CODE_VERSION)
+        code = self.get(key, '.code')
+        if code is None:
+            code = Transpiler(self.load(source)).compile()
+            self.put(key, code, '.code')
+        return code
@@ -0,0 +1,586 @@
+from parser import Id, Int, Real, Char, String, Boolean, ArrayElem, ArrayDecl, Decl, FuncCall, ProcCall, FuncImpl, ProcImpl, Block
+from console import Console
+from operators import BINARY as OPERATORS
+from runtime import BUILTINS, DEFAULTS, Routine, Var, char, ordinal, text
+from visitor import Visitor
+
+BREAK = 1
+CONTINUE = 2
+EXIT = 3
+
+CONST = 0
+SLOT = 1
+CLOSURE = 2
+
+FIRST = {CONST: 'a', SLOT: 'f[a]', CLOSURE: 'a(f)'}
+SECOND = {CONST: 'b', SLOT: 'f[b]', CLOSURE: 'b(f)'}
+
+# One closure factory per operator and operand form, so that evaluating a
+# BinOp never dispatches on the operator or on how its operands are stored.
+BINARY = {
+    (symbol, first, second): eval('lambda a, b: lambda f: ' + op.template.format(FIRST[first], SECOND[second]))
+    for symbol, op in OPERATORS.items() if op.template is not None
+    for first in FIRST
+    for second in SECOND
+}
+
+
+def closure(form, payload):
+    if form == CONST:
+        return lambda f: payload
+    elif form == SLOT:
+        return lambda f: f[payload]
+    return payload
+
+
+class Closures(Visitor):
+    def __init__(self, ast, console=None):
+        self.ast = ast
+        self.console = console or Console()
+        self.routines = {}
+        self.scopes = []
+        self.template = []
+        self.depth = 0
+        self.result = None
+        self.mains = []
+
+    def allocate(self, id_, type_):
+        var = Var(len(self.template), type_)
+        self.template.append(DEFAULTS.get(type_))
+        return var
+
+    def lookup(self, id_):
+        for scope in reversed(self.scopes):
+            if id_ in scope:
+                return scope[id_]
+        self.error("Undeclared identifier: {}".format(id_))
+
+    def declare(self, block):
+        scope = {}
+        for s in block.symbols:
+            if s.id_ not in scope:
+                scope[s.id_] = self.allocate(s.id_, s.type_)
+        self.scopes.append(scope)
+        return scope
+
+    def statements(self, parent, block):
+        statements = []
+        if block.var_decls is not None:
+            for decl in block.var_decls.decls:
+                statement = self.visit(block, decl)
+                if statement is not None:
+                    statements.append(statement)
+        for n in block.nodes:
+            statement = self.statement(block, n)
+            if statement is not None:
+                statements.append(statement)
+        return self.sequence(statements)
+
+    def sequence(self, statements):
+        if len(statements) == 0:
+            return lambda f: None
+        elif len(statements) == 1:
+            return statements[0]
+
+        statements = tuple(statements)
+
+        def run(f):
+            for statement in statements:
+                status = statement(f)
+                if status:
+                    return status
+
+        return run
+
+    def statement(self, parent, node):
+        if isinstance(node, (FuncCall, ProcCall, Id)):
+            if isinstance(node, Id):
+                if node.value not in self.routines and node.value not in BUILTINS:
+                    return None
+                node = FuncCall(node, None)
+            call = self.expression(parent, node)
+
+            def run(f):
+                call(f)
+
+            return run
+        return self.visit(parent, node)
+
+    def expression(self, parent, node):
+        return closure(*self.visit(parent, node))
+
+    def routine(self, node, result_type):
+        routine = self.routines[node.id_.value]
+        self.template = []
+        self.depth = 0
+        self.result = None
+        self.scopes = [{}]
+        if result_type is not None:
+            self.result = self.allocate(node.id_.value, result_type)
+            self.scopes[0][node.id_.value] = self.result
+            routine.result = self.result.slot
+        scope = self.declare(node.block)
+        routine.params = [scope[p.id_.value].slot for p in node.params.params]
+        routine.body = self.statements(node, node.block)
+        routine.template = self.template
+        self.scopes = []
+
+    def visit_Program(self, parent, node):
+        for n in node.nodes:
+            if isinstance(n, (FuncImpl, ProcImpl)):
+                self.routines[n.id_.value] = Routine(n.id_.value)
+        for n in node.nodes:
+            self.visit(node, n)
+
+    def visit_FuncImpl(self, parent, node):
+        if not isinstance(parent, type(self.ast)):
+            self.error("Unsupported nested function: {}".format(node.id_.value))
+        self.routine(node, node.type_.value)
+
+    def visit_ProcImpl(self, parent, node):
+        self.routine(node, None)
+
+    def visit_Block(self, parent, node):
+        if node.is_main:
+            main = Routine('main')
+            self.template = []
+            self.depth = 0
+            self.result = None
+            self.scopes = []
+            self.declare(node)
+            main.body = self.statements(parent, node)
+            main.template = self.template
+            self.scopes = []
+            self.mains.append(main)
+            return None
+
+        self.depth += 1
+        self.declare(node)
+        body = self.statements(parent, node)
+        self.scopes.pop()
+        self.depth -= 1
+        return body
+
+    def visit_Decl(self, parent, node):
+        var = self.lookup(node.id_.value)
+        slot = var.slot
+        if var.type_ == 'string':
+            def run(f):
+                f[slot] = []
+
+            return run
+        if self.depth == 0:
+            return None
+        default = DEFAULTS.get(var.type_)
+
+        def run(f):
+            f[slot] = default
+
+        return run
+
+    def visit_ArrayDecl(self, parent, node):
+        var = self.lookup(node.id_.value)
+        var.array = True
+        slot = var.slot
+        default = DEFAULTS.get(var.type_)
+        if node.from_ is not None:
+            var.offset = node.from_.value
+            length = node.to_.value - node.from_.value + 1
+        else:
+            length = 100
+        if node.elems is not None:
+            elems = [self.expression(node, e) for e in node.elems.elems]
+
+            def run(f):
+                values = [e(f) for e in elems]
+                f[slot] = values + [default] * (length - len(values))
+
+            return run
+        if node.size is not None:
+            size = self.expression(node, node.size)
+
+            def run(f):
+                f[slot] = [default] * size(f)
+
+            return run
+
+        def run(f):
+            f[slot] = [default] * length
+
+        return run
+
+    def visit_Assign(self, parent, node):
+        form, payload = self.visit(node, node.expr)
+        target = node.id_
+        if isinstance(target, ArrayElem):
+            var = self.lookup(target.id_.value)
+            slot, offset = var.slot, var.offset
+            index = self.expression(target, target.index)
+            value = closure(form, payload)
+
+            def run(f):
+                f[slot][index(f) - offset] = value(f)
+
+            return run
+
+        slot = self.lookup(target.value).slot
+        if form == CONST:
+            def run(f):
+                f[slot] = payload
+        elif form == SLOT:
+            def run(f):
+                f[slot] = f[payload]
+        else:
+            def run(f):
+                f[slot] = payload(f)
+        return run
+
+    def visit_If(self, parent, node):
+        cond = self.expression(node, node.cond)
+        true = self.visit(node, node.true)
+        if node.false is None:
+            def run(f):
+                if cond(f):
+                    return true(f)
+
+            return run
+        false = self.visit(node, node.false)
+
+        def run(f):
+            if cond(f):
+                return true(f)
+            return false(f)
+
+        return run
+
+    def visit_While(self, parent, node):
+        cond = self.expression(node, node.cond)
+        block = self.visit(node, node.block)
+
+        def run(f):
+            while cond(f):
+                status = block(f)
+                if status:
+                    if status == BREAK:
+                        break
+                    if status == EXIT:
+                        return status
+
+        return run
+
+    def visit_RepeatUntil(self, parent, node):
+        cond = self.expression(node, node.cond)
+        block = self.visit(node, node.block)
+
+        def run(f):
+            while True:
+                status = block(f)
+                if status:
+                    if status == BREAK:
+                        break
+                    if status == EXIT:
+                        return status
+                if cond(f):
+                    break
+
+        return run
+
+    def visit_For(self, parent, node):
+        if not isinstance(node.init.id_, Id):
+            self.error("Unsupported loop variable")
+        slot = self.lookup(node.init.id_.value).slot
+        start = self.expression(node, node.init.expr)
+        to = self.expression(node, node.to)
+        block = self.visit(node, node.block)
+
+        # The loop runs off f[slot] so body writes count, and it only steps after an iteration
+        if node.reversed:
+            def run(f):
+                f[slot] = start(f)
+                bound = to(f)
+                while f[slot] >= bound:
+                    status = block(f)
+                    if status:
+                        if status == BREAK:
+                            return None
+                        if status == EXIT:
+                            return status
+                    f[slot] -= 1
+
+            return run
+
+        def run(f):
+            f[slot] = start(f)
+            bound = to(f)
+            while f[slot] <= bound:
+                status = block(f)
+                if status:
+                    if status == BREAK:
+                        return None
+                    if status == EXIT:
+                        return status
+                f[slot] += 1
+
+        return run
+
+    def visit_Break(self, parent, node):
+        return lambda f: BREAK
+
+    def visit_Continue(self, parent, node):
+        return lambda f: CONTINUE
+
+    def visit_Exit(self, parent, node):
+        if node.expr is None:
+            return lambda f: EXIT
+        var = self.result
+        value = self.expression(node, node.expr)
+        if var is None:
+            def run(f):
+                value(f)
+                return EXIT
+
+            return run
+        slot = var.slot
+
+        def run(f):
+            f[slot] = value(f)
+            return EXIT
+
+        return run
+
+    def visit_FuncCall(self, parent, node):
+        func = node.id_.value
+        args = node.args.args if node.args is not None else []
+        if func == 'write' or func == 'writeln':
+            return CLOSURE, self.write(args, '\n' if func == 'writeln' else '')
+        elif func == 'read' or func == 'readln':
+            return CLOSURE, self.read(args, func == 'readln')
+        elif func == 'chr':
+            form, payload = self.visit(node, args[0])
+            if form == CONST:
+                return CONST, chr(payload)
+            value = closure(form, payload)
+            return CLOSURE, lambda f: chr(value(f))
+        elif func == 'ord':
+            form, payload = self.visit(node, args[0])
+            if form == CONST:
+                return CONST, ordinal(payload)
+            value = closure(form, payload)
+            return CLOSURE, lambda f: ordinal(value(f))
+        elif func == 'strlen':
+            if isinstance(args[0], String):
+                return CONST, len(args[0].value)
+            slot = self.lookup(args[0].value).slot
+            return CLOSURE, lambda f: len(text(f[slot]))
+        elif func == 'strcat':
+            return CLOSURE, self.strcat(args[0], args[1])
+        elif func in self.routines:
+            return CLOSURE, self.call(self.routines[func], [self.expression(node, a) for a in args])
+        self.error("Unknown routine: {}".format(func))
+
+    def visit_ProcCall(self, parent, node):
+        return self.visit_FuncCall(parent, node)
+
+    def call(self, routine, args):
+        args = tuple(args)
+
+        def run(f):
+            frame = routine.template.copy()
+            for slot, arg in zip(routine.params, args):
+                frame[slot] = arg(f)
+            routine.body(frame)
+            if routine.result is not None:
+                return frame[routine.result]
+
+        return run
+
+    def write(self, args, end):
+        write = self.console.write
+        parts = [self.format(a) for a in args]
+        if all(isinstance(p, str) for p in parts):
+            output = ''.join(parts) + end
+
+            def run(f):
+                write(output)
+
+            return run
+        parts = tuple(p if callable(p) else (lambda f, p=p: p) for p in parts)
+        if len(parts) == 1:
+            part = parts[0]
+
+            def run(f):
+                write(part(f) + end)
+
+            return run
+
+        def run(f):
+            write(''.join([part(f) for part in parts]) + end)
+
+        return run
+
+    def format(self, node):
+        if isinstance(node, Int):
+            return str(node.value)
+        elif isinstance(node, (Boolean, Char, String, Real)) and getattr(node, 'roundings', None) is None:
+            return str(node.value)
+
+        roundings = getattr(node, 'roundings', None)
+        if roundings is not None:
+            pattern = '{:' + str(roundings[0].value) + '.' + str(roundings[1].value) + 'f}'
+            value = self.expression(None, node)
+            return lambda f: pattern.format(value(f))
+
+        if isinstance(node, Id) and node.value not in self.routines:
+            var = self.lookup(node.value)
+            slot = var.slot
+            if var.array or var.type_ == 'string':
+                if var.type_ in ['char', 'string']:
+                    return lambda f: text(f[slot])
+                return lambda f: str(f[slot])
+            if var.type_ == 'char':
+                return lambda f: char(f[slot])
+            return lambda f: str(f[slot])
+
+        value = self.expression(None, node)
+        if isinstance(node, ArrayElem) and self.lookup(node.id_.value).type_ == 'char':
+            return lambda f: char(value(f))
+        return lambda f: str(value(f))
+
+    def read(self, args, line):
+        console = self.console
+        stores = tuple(self.store(a) for a in args)
+
+        def run(f):
+            for store in stores:
+                store(f, console.token())
+            if line:
+                console.skip_line()
+
+        return run
+
+    def store(self, node):
+        if isinstance(node, ArrayElem):
+            var = self.lookup(node.id_.value)
+            convert = self.converter(var.type_)
+            slot, offset = var.slot, var.offset
+            index = self.expression(node, node.index)
+
+            def run(f, word):
+                f[slot][index(f) - offset] = convert(word)
+
+            return run
+
+        var = self.lookup(node.value)
+        slot = var.slot
+        if var.array or var.type_ == 'string':
+            def run(f, word):
+                storage = f[slot]
+                codes = [ord(c) for c in word]
+                if var.array:
+                    storage[:len(codes)] = codes
+                else:
+                    storage.extend(codes)
+
+            return run
+        convert = self.converter(var.type_)
+
+        def run(f, word):
+            f[slot] = convert(word)
+
+        return run
+
+    def converter(self, type_):
+        if type_ == 'integer':
+            return int
+        elif type_ == 'real':
+            return float
+        elif type_ == 'char':
+            return lambda word: ord(word[0])
+        elif type_ == 'boolean':
+            return lambda word: word.lower() == 'true'
+        return str
+
+    def strcat(self, dest, src):
+        slot = self.lookup(dest.value).slot
+        if isinstance(src, String):
+            codes = [ord(c) for c in src.value]
+            source = lambda f: codes
+        else:
+            other = self.lookup(src.value).slot
+            source = lambda f: [c for c in f[other] if c]
+
+        def run(f):
+            storage = f[slot]
+            codes = source(f)
+            end = len(storage)
+            while end > 0 and not storage[end - 1]:
+                end -= 1
+            storage[end:end + len(codes)] = codes
+
+        return run
+
+    def visit_Int(self, parent, node):
+        return CONST, node.value
+
+    def visit_Real(self, parent, node):
+        return CONST, float(node.value)
+
+    def visit_Boolean(self, parent, node):
+        return CONST, node.value == 'true'
+
+    def visit_Char(self, parent, node):
+        return CONST, ord(node.value)
+
+    def visit_String(self, parent, node):
+        return CONST, node.value
+
+    def visit_Id(self, parent, node):
+        if node.value in self.routines and not any(node.value in scope for scope in self.scopes):
+            return self.visit_FuncCall(parent, FuncCall(node, None))
+        return SLOT, self.lookup(node.value).slot
+
+    def visit_ArrayElem(self, parent, node):
+        var = self.lookup(node.id_.value)
+        slot, offset = var.slot, var.offset
+        form, payload = self.visit(node, node.index)
+        if form == CONST:
+            index = payload - offset
+            return CLOSURE, lambda f: f[slot][index]
+        elif form == SLOT:
+            if offset == 0:
+                return CLOSURE, lambda f: f[slot][f[payload]]
+            return CLOSURE, lambda f: f[slot][f[payload] - offset]
+        return CLOSURE, lambda f: f[slot][payload(f) - offset]
+
+    def visit_BinOp(self, parent, node):
+        first, a = self.visit(node, node.first)
+        second, b = self.visit(node, node.second)
+        if first == CONST and second == CONST:
+            first, a = CLOSURE, closure(first, a)
+        return CLOSURE, BINARY[(node.symbol, first, second)](a, b)
+
+    def visit_UnOp(self, parent, node):
+        form, payload = self.visit(node, node.first)
+        if node.symbol == '-':
+            if form == CONST:
+                return CONST, -payload
+            elif form == SLOT:
+                return CLOSURE, lambda f: -f[payload]
+            return CLOSURE, lambda f: -payload(f)
+        value = closure(form, payload)
+        apply = node.op.apply
+        return CLOSURE, lambda f: apply(value(f))
+
+    def compile(self):
+        self.visit(None, self.ast)
+        return self.mains
+
+    def run(self):
+        try:
+            for main in self.compile():
+                main.body(main.template.copy())
+        finally:
+            self.console.flush()
+
+    def error(self, text):
+        raise SystemExit(text)
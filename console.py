@@ -0,0 +1,101 @@
+import codecs
+import sys
+
+BLOCK = 1 << 16
+LIMIT = 1 << 16
+
+
+class Console:
+    def __init__(self, stdin=None, stdout=None, limit=LIMIT):
+        self.stdin = stdin or sys.stdin
+        self.stdout = stdout or sys.stdout
+        self.limit = limit
+        self.pending = []
+        self.size = 0
+        self.lines = []
+        self.next = 0
+        self.tail = ''
+        self.eof = False
+        self.decoder = None
+        self.line = None
+        self.words = []
+        self.index = 0
+
+    def write(self, text):
+        self.pending.append(text)
+        self.size += len(text)
+        if self.size >= self.limit:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.stdout.write(''.join(self.pending))
+            self.pending = []
+            self.size = 0
+        self.stdout.flush()
+
+    def fill(self):
+        # Anything printed so far may be a prompt for the input we wait on
+        self.flush()
+        chunk = self.chunk()
+        if chunk:
+            self.lines = (self.tail + chunk).split('\n')
+            self.tail = self.lines.pop()
+        else:
+            self.eof = True
+            self.lines = [self.tail] if self.tail else []
+            self.tail = ''
+        self.next = 0
+
+    def chunk(self):
+        raw = getattr(self.stdin, 'buffer', None)
+        if raw is None or not hasattr(raw, 'read1'):
+            return self.stdin.read(BLOCK)
+        if self.decoder is None:
+            self.decoder = codecs.getincrementaldecoder(self.stdin.encoding or 'utf-8')()
+        while True:
+            data = raw.read1(BLOCK)
+            text = self.decoder.decode(data, not data)
+            if text or not data:
+                return text
+
+    def readline(self):
+        while self.next >= len(self.lines):
+            if self.eof:
+                return None
+            self.fill()
+        line = self.lines[self.next]
+        self.next += 1
+        return line
+
+    def token(self):
+        while self.index >= len(self.words):
+            line = self.readline()
+            if line is None:
+                raise EOFError('Unexpected end of input')
+            self.line = line
+            self.words = line.split()
+            self.index = 0
+        word = self.words[self.index]
+        self.index += 1
+        return word
+
+    def tokens(self):
+        if self.index < len(self.words):
+            words = self.words[self.index:]
+        else:
+            line = self.readline()
+            if line is None:
+                raise EOFError('Unexpected end of input')
+            words = line.split()
+        self.line = None
+        self.words = []
+        self.index = 0
+        return words
+
+    def skip_line(self):
+        if self.line is None:
+            self.readline()
+        self.line = None
+        self.words = []
+        self.index = 0
@@ -378,32 +378,12 @@ class Generator(Visitor):
     def visit_BinOp(self, parent, node):
         self.append('(')
         self.visit(node, node.first)
-        if node.symbol == 'and':
-            self.append(' && ')
-        elif node.symbol == 'or':
-            self.append(' || ')
-        elif node.symbol == '/':
-            self.append(' / ')
-        elif node.symbol == '=':
-            self.append(' == ')
-        elif node.symbol == 'mod':
-            self.append(' % ')
-        elif node.symbol == 'div':
-            self.append(' / ')
-        elif node.symbol == '<>':
-            self.append(' != ')
-        else:
-            self.append(' ')
-            self.append(node.symbol)
-            self.append(' ')
+        self.append(node.op.token)
         self.visit(node, node.second)
         self.append(')')
 
     def visit_UnOp(self, parent, node):
-        if node.symbol == 'not':
-            self.append('!')
-        elif node.symbol != '&':
-            self.append(node.symbol)
+        self.append(node.op.token)
         self.visit(node, node.first)
 
     def generate(self, path):
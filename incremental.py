@@ -0,0 +1,76 @@
+from bisect import bisect_left, bisect_right
+from lexer import Class, RegexLexer
+from parser import Parser, Program, FuncImpl, ProcImpl
+from symbolizer import Symbolizer
+
+
+class Incremental:
+    def __init__(self, text):
+        self.text = text
+        self.ast = None
+        self.starts = []
+        self.ends = []
+        self.reused = 0
+        self.reparsed = 0
+        self.build()
+
+    def build(self):
+        self.ast = None
+        nodes, self.starts, self.ends = self.parse(self.text, 0)
+        ast = Program(nodes)
+        Symbolizer(ast).symbolize()
+        self.ast = ast
+        self.reused = 0
+        self.reparsed = len(nodes)
+
+    def parse(self, text, offset):
+        tokens = RegexLexer(text).compact()
+        parser = Parser(tokens)
+        nodes, starts, ends = [], [], []
+        while parser.curr.class_ != Class.EOF:
+            first = parser.pos
+            nodes.append(parser.top_level())
+            starts.append(offset + tokens.starts[first])
+            ends.append(offset + tokens.ends[parser.pos - 1])
+        return nodes, starts, ends
+
+    def edit(self, start, end, replacement):
+        old = self.text
+        self.text = old[:start] + replacement + old[end:]
+        if self.ast is None:
+            self.build()
+            return self.ast
+
+        delta = len(replacement) - (end - start)
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        region_start = self.ends[lo - 1] if lo > 0 else 0
+        region_end = self.starts[hi] if hi < len(self.starts) else len(old)
+        try:
+            nodes, starts, ends = self.parse(self.text[region_start:region_end + delta], region_start)
+        except (SystemExit, IndexError):
+            self.build()
+            return self.ast
+
+        program = self.ast
+        for node in program.nodes[lo:hi]:
+            program.symbols.remove(self.name(node))
+        symbolizer = Symbolizer(program)
+        for node in nodes:
+            symbolizer.visit(program, node)
+
+        program.nodes[lo:hi] = nodes
+        self.starts[lo:hi] = starts
+        self.ends[lo:hi] = ends
+        for i in range(lo + len(nodes), len(self.starts)):
+            self.starts[i] += delta
+            self.ends[i] += delta
+
+        self.reparsed = len(nodes)
+        self.reused = len(program.nodes) - len(nodes)
+        return program
+
+    def name(self, node):
+        if isinstance(node, (FuncImpl, ProcImpl)):
+            return node.id_.value
+        return 'main'
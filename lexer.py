@@ -1,4 +1,6 @@
+from array import array
 from enum import Enum, auto
+import re
 
 
 class Class(Enum):
@@ -46,6 +48,7 @@ class Class(Enum):
     WHILE = auto()
     FOR = auto()
 
+    FROM = auto()
     TO = auto()
     DOWNTO = auto()
     DO = auto()
@@ -84,6 +87,58 @@ class Token:
         return "<{} {}>".format(self.class_, self.lexeme)
 
 
+CLASSES = {class_.value: class_ for class_ in Class}
+
+
+class TokenRef:
+    __slots__ = ('tokens', 'index', 'class_')
+
+    def __init__(self, tokens, index):
+        self.tokens = tokens
+        self.index = index
+        self.class_ = CLASSES[tokens.classes[index]]
+
+    @property
+    def lexeme(self):
+        return self.tokens.lexeme(self.index)
+
+    def __str__(self):
+        return "<{} {}>".format(self.class_, self.lexeme)
+
+
+class TokenArray:
+    def __init__(self, text):
+        self.text = text
+        self.classes = array('B')
+        self.starts = array('l')
+        self.ends = array('l')
+
+    def append(self, class_, start, end):
+        self.classes.append(class_.value)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def class_(self, index):
+        return CLASSES[self.classes[index]]
+
+    def lexeme(self, index):
+        class_ = self.classes[index]
+        if class_ == Class.EOF.value:
+            return None
+        lexeme = self.text[self.starts[index]:self.ends[index]]
+        if class_ == Class.INT.value:
+            return int(lexeme)
+        return lexeme
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.classes)
+        return TokenRef(self, index)
+
+    def __len__(self):
+        return len(self.classes)
+
+
 class Lexer:
     def __init__(self, text):
         self.text = text
@@ -258,14 +313,155 @@ class Lexer:
             pass
         return token
 
-    def lex(self):
-        tokens = []
+    def tokens(self):
         while True:
             curr = self.next_token()
-            tokens.append(curr)
+            yield curr
             if curr.class_ == Class.EOF:
                 break
-        return tokens
+
+    def lex(self):
+        return list(self.tokens())
 
     def die(self, char):
         raise SystemExit("Unexpected character: {}".format(char))
+
+
+KEYWORDS = {
+    'begin': Class.BEGIN,
+    'end': Class.END,
+    'var': Class.VAR,
+    'if': Class.IF,
+    'else': Class.ELSE,
+    'then': Class.THEN,
+    'while': Class.WHILE,
+    'for': Class.FOR,
+    'repeat': Class.REPEAT,
+    'until': Class.UNTIL,
+    'do': Class.DO,
+    'break': Class.BREAK,
+    'continue': Class.CONTINUE,
+    'exit': Class.EXIT,
+    'procedure': Class.PROCEDURE,
+    'function': Class.FUNCTION,
+    'array': Class.ARRAY,
+    'from': Class.FROM,
+    'to': Class.TO,
+    'downto': Class.DOWNTO,
+    'true': Class.BOOLEAN,
+    'false': Class.BOOLEAN,
+    'of': Class.OF,
+    'mod': Class.MOD,
+    'div': Class.DIV,
+    'and': Class.AND,
+    'not': Class.NOT,
+    'or': Class.OR,
+    'xor': Class.XOR,
+    'integer': Class.TYPE,
+    'real': Class.TYPE,
+    'char': Class.TYPE,
+    'boolean': Class.TYPE,
+    'string': Class.TYPE,
+}
+
+SYMBOLS = {
+    '+': Class.PLUS,
+    '-': Class.MINUS,
+    '*': Class.STAR,
+    '/': Class.FWDSLASH,
+    '%': Class.PERCENT,
+    '=': Class.EQ,
+    ':=': Class.ASSIGN,
+    ':': Class.COLON,
+    '<=': Class.LTE,
+    '<>': Class.NEQ,
+    '<': Class.LT,
+    '>=': Class.GTE,
+    '>': Class.GT,
+    '(': Class.LPAREN,
+    ')': Class.RPAREN,
+    '[': Class.LBRACKET,
+    ']': Class.RBRACKET,
+    '{': Class.LBRACE,
+    '}': Class.RBRACE,
+    ';': Class.SEMICOLON,
+    ',': Class.COMMA,
+    '.': Class.DOT,
+}
+
+MASTER = re.compile(r"""
+    \s*
+    (?:
+        (?P<ID>[^\W\d_]\w*)
+      | (?P<INT>\d+)
+      | '(?P<CHAR>.)'
+      | '(?P<STRING>[^']*)'?
+      | (?P<SYMBOL>:=|<=|<>|>=|[-+*/%=:<>()\[\]{};,.])
+      | (?P<ERROR>\S)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+
+CHUNK_SIZE = 1 << 16
+
+
+class RegexLexer(Lexer):
+    @classmethod
+    def stream(cls, source, chunk_size=CHUNK_SIZE):
+        lexer = cls('')
+        rest = ''
+        while True:
+            chunk = source.read(chunk_size)
+            text = rest + chunk
+            done = yield from lexer.scan(text, final=not chunk)
+            if not chunk:
+                break
+            rest = text[done:]
+        yield Token(Class.EOF, None)
+
+    def tokens(self):
+        yield from self.scan(self.text)
+        yield Token(Class.EOF, None)
+
+    def scan(self, text, final=True):
+        keywords, symbols = KEYWORDS, SYMBOLS
+        size = len(text)
+        for m in MASTER.finditer(text):
+            if not final and m.end() == size:
+                return m.start()
+            kind = m.lastgroup
+            lexeme = m[kind]
+            if kind == 'ID':
+                yield Token(keywords.get(lexeme, Class.ID), lexeme)
+            elif kind == 'SYMBOL':
+                yield Token(symbols[lexeme], lexeme)
+            elif kind == 'INT':
+                yield Token(Class.INT, int(lexeme))
+            elif kind == 'CHAR':
+                yield Token(Class.CHAR, lexeme)
+            elif kind == 'STRING':
+                yield Token(Class.STRING, lexeme)
+            else:
+                self.die(lexeme)
+        return size
+
+    def lex(self):
+        return list(self.tokens())
+
+    def compact(self):
+        tokens = TokenArray(self.text)
+        keywords, symbols = KEYWORDS, SYMBOLS
+        for m in MASTER.finditer(self.text):
+            kind = m.lastgroup
+            start, end = m.span(kind)
+            if kind == 'ID':
+                class_ = keywords.get(m[kind], Class.ID)
+            elif kind == 'SYMBOL':
+                class_ = symbols[m[kind]]
+            elif kind == 'ERROR':
+                self.die(m[kind])
+            else:
+                class_ = Class[kind]
+            tokens.append(class_, start, end)
+        tokens.append(Class.EOF, len(self.text), len(self.text))
+        return tokens
@@ -1,27 +1,30 @@
-from lexer import Lexer
-from parser import Parser
-from symbolizer import Symbolizer
+from cache import Cache
 from generator import Generator
+from optimizer import Optimizer
 from runner import Runner
+from vm import VM, Compiler
 
 
 def run():
     test_id = '01'  # Test folder number [01-11]
     path_root = 'Tests/'
+    optimize = True  # Fold constants and drop dead code before running
+    stackless = False  # Run on the VM's explicit call stack for deep recursion
+    native = False  # Compile pure integer functions to C and call them through ctypes
     args = {'src': f'{path_root}{test_id}/src.pas', 'gen': f'{path_root}{test_id}/gen.c'}
 
     with open(args['src'], 'r') as source:
-        text = source.read()
-        lexer = Lexer(text)
-        tokens = lexer.lex()
-        parser = Parser(tokens)
-        ast = parser.parse()
-        symbolizer = Symbolizer(ast)
-        symbolizer.symbolize()
+        cache = Cache()
+        ast = cache.load(source)
+        if optimize:
+            Optimizer(ast).optimize()
         generator = Generator(ast)
         generator.generate(args['gen'])
-        runner = Runner(ast)
-        runner.run()
+        if stackless:
+            VM(Compiler(ast).compile()).run()
+        else:
+            runner = Runner(ast, native=native)
+            runner.run()
 
 
 run()
@@ -0,0 +1,342 @@
+import ctypes
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+
+from cache import CACHE_DIR
+from generator import Generator
+from parser import walk, Int, Real, Char, String, ArrayDecl, BinOp, UnOp, FuncCall, Break, Continue, Exit, FuncImpl, If, While, For
+from purity import MISSING, Purity
+from symbolizer import BUILTINS
+
+INTEGRAL = ['integer', 'boolean']
+
+OPERATORS = ['+', '-', '*', 'div', 'mod', '=', '<>', '<', '>', '<=', '>=', 'and', 'or']
+
+CHECKED = {'+': 'pas_add', '-': 'pas_sub', '*': 'pas_mul', 'div': 'pas_div', 'mod': 'pas_mod'}
+
+LOW = -(1 << 63)
+HIGH = (1 << 63) - 1
+
+# Largest local array a native routine may keep on the C stack
+ELEMENTS = 1 << 12
+
+# Bytes of C stack native frames may use before the call falls back to the Runner
+BUDGET = 1 << 22
+
+FLAGS = ['-O2', '-shared', '-fPIC']
+
+PRELUDE = '''#include <limits.h>
+#include <setjmp.h>
+
+static jmp_buf pas_env;
+static long long pas_used;
+
+static void pas_fault(void) {
+    longjmp(pas_env, 1);
+}
+
+static long long pas_add(long long a, long long b) {
+    long long r;
+    if (__builtin_add_overflow(a, b, &r)) pas_fault();
+    return r;
+}
+
+static long long pas_sub(long long a, long long b) {
+    long long r;
+    if (__builtin_sub_overflow(a, b, &r)) pas_fault();
+    return r;
+}
+
+static long long pas_mul(long long a, long long b) {
+    long long r;
+    if (__builtin_mul_overflow(a, b, &r)) pas_fault();
+    return r;
+}
+
+static long long pas_neg(long long a) {
+    if (a == LLONG_MIN) pas_fault();
+    return -a;
+}
+
+static long long pas_div(long long a, long long b) {
+    if (b == 0 || (a == LLONG_MIN && b == -1)) pas_fault();
+    long long q = a / b;
+    if (a % b != 0 && (a < 0) != (b < 0)) q--;
+    return q;
+}
+
+static long long pas_mod(long long a, long long b) {
+    if (b == 0) pas_fault();
+    if (b == -1) return 0;
+    long long r = a % b;
+    if (r != 0 && (r < 0) != (b < 0)) r += b;
+    return r;
+}
+
+static long long pas_index(long long i, long long lo, long long n) {
+    if (i < lo || i - lo >= n) pas_fault();
+    return i - lo;
+}
+
+static long long pas_bound(long long a) {
+    if (a == LLONG_MIN || a == LLONG_MAX) pas_fault();
+    return a;
+}
+
+static void pas_enter(long long bytes) {
+    pas_used += bytes;
+    if (pas_used > {budget}) pas_fault();
+}
+'''
+
+
+def declarations(impl):
+    return impl.block.var_decls.decls if impl.block.var_decls is not None else []
+
+
+def footprint(impl):
+    cells = len(impl.block.layout) + 8
+    for decl in declarations(impl):
+        if isinstance(decl, ArrayDecl):
+            cells += decl.to_.value - decl.from_.value + 1
+    return cells * 8
+
+
+class NativeGenerator(Generator):
+    def __init__(self, ast, routines):
+        super().__init__(ast)
+        self.routines = routines
+        self.arrays = {}
+
+    def emit(self):
+        self.append(PRELUDE.replace('{budget}', str(BUDGET)))
+        for impl in self.routines:
+            self.newline()
+            self.append('static long long f_{}({});'.format(impl.id_.value, self.params(impl)))
+        for impl in self.routines:
+            self.newline()
+            self.visit(None, impl)
+        return self.py
+
+    def params(self, impl):
+        return ', '.join('long long v_' + p.id_.value for p in impl.params.params)
+
+    def visit_FuncImpl(self, parent, node):
+        name = node.id_.value
+        params = self.params(node)
+        args = ', '.join('v_' + p.id_.value for p in node.params.params)
+        self.arrays = {}
+        for decl in declarations(node):
+            if isinstance(decl, ArrayDecl):
+                self.arrays[decl.id_.value] = (decl.from_.value, decl.to_.value - decl.from_.value + 1)
+
+        self.append('static long long body_{}({}) {{'.format(name, params))
+        self.newline()
+        self.visit(node, node.block)
+        self.append('\tpas_fault();')
+        self.newline()
+        self.append('\treturn 0;')
+        self.newline()
+        self.append('}')
+        self.newline()
+
+        bytes_ = footprint(node)
+        self.append('static long long f_{}({}) {{'.format(name, params))
+        self.newline()
+        self.append('\tpas_enter({});'.format(bytes_))
+        self.newline()
+        self.append('\tlong long r = body_{}({});'.format(name, args))
+        self.newline()
+        self.append('\tpas_used -= {};'.format(bytes_))
+        self.newline()
+        self.append('\treturn r;')
+        self.newline()
+        self.append('}')
+        self.newline()
+
+        self.append('int pas_call_{}({}{}long long *result) {{'.format(name, params, ', ' if params else ''))
+        self.newline()
+        self.append('\tif (setjmp(pas_env)) return 1;')
+        self.newline()
+        self.append('\tpas_used = 0;')
+        self.newline()
+        self.append('\t*result = f_{}({});'.format(name, args))
+        self.newline()
+        self.append('\treturn 0;')
+        self.newline()
+        self.append('}')
+        self.newline()
+
+    def visit_Block(self, parent, node):
+        self.level += 1
+        if node.var_decls is not None:
+            self.visit(node, node.var_decls)
+        for n in node.nodes:
+            self.indent()
+            self.visit(node, n)
+            if not isinstance(n, (If, While, For)):
+                self.append(';')
+            self.newline()
+        self.level -= 1
+
+    def visit_Decl(self, parent, node):
+        self.append('long long v_{} = 0;'.format(node.id_.value))
+
+    def visit_ArrayDecl(self, parent, node):
+        self.append('long long v_{}[{}] = {{0}};'.format(node.id_.value, self.arrays[node.id_.value][1]))
+
+    def visit_ArrayElem(self, parent, node):
+        lo, n = self.arrays[node.id_.value]
+        self.visit(node, node.id_)
+        self.append('[pas_index(')
+        self.visit(node, node.index)
+        self.append(', {}, {})]'.format(lo, n))
+
+    def visit_For(self, parent, node):
+        var = 'v_' + node.init.id_.value
+        self.append('{ ')
+        self.visit(node, node.init)
+        self.append('; long long to = pas_bound(')
+        self.visit(node, node.to)
+        self.append('); for (; {}{}to; {}) {{'.format(var, ' >= ' if node.reversed else ' <= ', var + ('--' if node.reversed else '++')))
+        self.newline()
+        self.visit(node, node.block)
+        self.indent()
+        self.append('} }')
+
+    def visit_FuncCall(self, parent, node):
+        self.append('f_' + node.id_.value)
+        self.append('(')
+        self.visit(node, node.args)
+        self.append(')')
+
+    def visit_Id(self, parent, node):
+        self.append('v_' + node.value)
+
+    def visit_BinOp(self, parent, node):
+        checked = CHECKED.get(node.symbol)
+        if checked is None:
+            super().visit_BinOp(parent, node)
+            return
+        self.append(checked)
+        self.append('(')
+        self.visit(node, node.first)
+        self.append(', ')
+        self.visit(node, node.second)
+        self.append(')')
+
+    def visit_UnOp(self, parent, node):
+        if node.symbol == '-':
+            self.append('pas_neg(')
+            self.visit(node, node.first)
+            self.append(')')
+        else:
+            super().visit_UnOp(parent, node)
+
+
+class Routine:
+    def __init__(self, name, function, type_):
+        self.name = name
+        self.function = function
+        self.type_ = type_
+        self.result = ctypes.c_longlong()
+        self.calls = 0
+        self.faults = 0
+
+    def call(self, args):
+        for a in args:
+            if type(a) not in (int, bool) or not LOW <= a <= HIGH:
+                return MISSING
+        if self.function(*args, ctypes.byref(self.result)):
+            self.faults += 1
+            return MISSING
+        self.calls += 1
+        value = self.result.value
+        return value != 0 if self.type_ == 'boolean' else value
+
+
+class Native:
+    def __init__(self, ast, compiler=None, root=CACHE_DIR):
+        self.ast = ast
+        self.compiler = compiler or os.environ.get('CC', 'cc')
+        self.root = root
+        self.routines = {}
+        self.path = None
+
+    def build(self):
+        compiler = shutil.which(self.compiler)
+        impls = self.eligible()
+        if compiler is None or not impls:
+            return self.routines
+        source = NativeGenerator(self.ast, impls).emit()
+        digest = hashlib.sha256(' '.join([compiler] + FLAGS).encode())
+        digest.update(source.encode())
+        self.path = os.path.join(self.root, digest.hexdigest() + '.so')
+        if not os.path.exists(self.path) and not self.compile(compiler, source):
+            return self.routines
+        library = ctypes.CDLL(self.path)
+        for impl in impls:
+            name = impl.id_.value
+            function = getattr(library, 'pas_call_' + name)
+            function.argtypes = [ctypes.c_longlong] * len(impl.params.params) + [ctypes.POINTER(ctypes.c_longlong)]
+            function.restype = ctypes.c_int
+            self.routines[name] = Routine(name, function, impl.type_.value)
+        return self.routines
+
+    def compile(self, compiler, source):
+        os.makedirs(self.root, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.root) as work:
+            path = os.path.join(work, 'native.c')
+            with open(path, 'w') as file:
+                file.write(source)
+            target = os.path.join(work, 'native.so')
+            done = subprocess.run([compiler] + FLAGS + ['-o', target, path], capture_output=True)
+            if done.returncode != 0:
+                return False
+            os.replace(target, self.path)
+        return True
+
+    def eligible(self):
+        purity = Purity(self.ast)
+        pure = purity.analyze()
+        impls = {name: purity.routines[name] for name in pure if self.integral(purity.routines[name])}
+        changed = True
+        while changed:
+            changed = False
+            for name in list(impls):
+                if not purity.calls[name] <= impls.keys():
+                    del impls[name]
+                    changed = True
+        return [impls[name] for name in sorted(impls)]
+
+    def integral(self, impl):
+        if impl.type_.value not in INTEGRAL or any(p.type_.value not in INTEGRAL for p in impl.params.params):
+            return False
+        for decl in declarations(impl):
+            if decl.type_.value not in INTEGRAL:
+                return False
+            if isinstance(decl, ArrayDecl):
+                if decl.from_ is None or decl.elems is not None:
+                    return False
+                if not 0 < decl.to_.value - decl.from_.value + 1 <= ELEMENTS:
+                    return False
+        for n in walk(impl.block):
+            if isinstance(n, (Real, Char, String, FuncImpl)):
+                return False
+            elif isinstance(n, (Break, Continue)):
+                # C break and continue would not match how the Runner treats them
+                return False
+            elif isinstance(n, Int) and (type(n.value) is not int or not LOW <= n.value <= HIGH):
+                return False
+            elif isinstance(n, BinOp) and (n.symbol not in OPERATORS or n.roundings is not None):
+                return False
+            elif isinstance(n, UnOp) and n.symbol not in ['-', 'not']:
+                return False
+            elif isinstance(n, FuncCall) and n.id_.value in BUILTINS:
+                return False
+            elif isinstance(n, Exit) and n.expr is None:
+                return False
+        return True
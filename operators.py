@@ -0,0 +1,64 @@
+class Operator:
+    __slots__ = ('symbol', 'arity', 'template', 'apply', 'token', 'short')
+
+    def __init__(self, symbol, arity, template, token, short=None):
+        self.symbol = symbol
+        self.arity = arity
+        # Python expression over the operands, the one definition every engine evaluates or emits
+        self.template = template
+        self.apply = function(arity, template) if template is not None else unknown
+        self.token = token
+        # Result of and/or when the first operand decides it, None for strict operators
+        self.short = short
+
+    def __reduce__(self):
+        # Cached ASTs refer back to the shared tables instead of pickling the functions
+        return (binary if self.arity == 2 else unary), (self.symbol,)
+
+
+def function(arity, template):
+    names = ['a', 'b'][:arity]
+    return eval('lambda {}: {}'.format(', '.join(names), template.format(*names)))
+
+
+def unknown(*operands):
+    return None
+
+
+BINARY = {op.symbol: op for op in [
+    Operator('+', 2, '({} + {})', ' + '),
+    Operator('-', 2, '({} - {})', ' - '),
+    Operator('*', 2, '({} * {})', ' * '),
+    Operator('/', 2, '({} / {})', ' / '),
+    Operator('div', 2, '(int({}) // int({}))', ' / '),
+    Operator('mod', 2, '({} % {})', ' % '),
+    Operator('=', 2, '({} == {})', ' == '),
+    Operator('<>', 2, '({} != {})', ' != '),
+    Operator('<', 2, '({} < {})', ' < '),
+    Operator('>', 2, '({} > {})', ' > '),
+    Operator('<=', 2, '({} <= {})', ' <= '),
+    Operator('>=', 2, '({} >= {})', ' >= '),
+    Operator('and', 2, '({} != 0 and {} != 0)', ' && ', False),
+    Operator('or', 2, '({} != 0 or {} != 0)', ' || ', True),
+    Operator('xor', 2, '(({} != 0) != ({} != 0))', ' xor '),
+]}
+
+UNARY = {op.symbol: op for op in [
+    Operator('-', 1, '(-{})', '-'),
+    Operator('not', 1, '(not {} != 0)', '!'),
+    Operator('&', 1, None, ''),
+]}
+
+
+def binary(symbol):
+    op = BINARY.get(symbol)
+    if op is None:
+        op = BINARY[symbol] = Operator(symbol, 2, None, ' ' + symbol + ' ')
+    return op
+
+
+def unary(symbol):
+    op = UNARY.get(symbol)
+    if op is None:
+        op = UNARY[symbol] = Operator(symbol, 1, None, symbol)
+    return op
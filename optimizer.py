@@ -0,0 +1,473 @@
+from parser import walk, Int, Real, Char, Boolean, Id, Type, Decl, VarDecl, Assign, BinOp, UnOp, FuncCall, ProcCall, ArrayElem, Block, If, While, RepeatUntil, For, Break, Continue, Exit
+from symbolizer import BUILTINS, LOCAL
+from visitor import Visitor
+
+# Operators whose result on two literals is again a literal
+FOLDABLE = ['+', '-', '*', 'div', 'mod', '=', '<>', '<', '>', '<=', '>=', 'and', 'or']
+
+# (symbol, neutral operand, side): x + 0, 0 + x, x - 0, x * 1, 1 * x, x div 1
+IDENTITIES = {
+    ('+', 0, 'second'), ('+', 0, 'first'), ('-', 0, 'second'),
+    ('*', 1, 'second'), ('*', 1, 'first'), ('div', 1, 'second'),
+}
+
+# The Runner carries on past continue, so only exit and break make what follows dead
+JUMPS = (Exit, Break)
+
+LOOPS = (While, RepeatUntil, For)
+
+COMPARISONS = ['=', '<>', '<', '>', '<=', '>=', 'and', 'or']
+
+HOISTABLE = ['integer', 'real', 'boolean']
+
+# Builtins that store into their argument at the given position
+STORES = {'read': None, 'readln': None, 'strcat': 0, 'concat': 0, 'inc': 0, 'dec': 0, 'insert': 1}
+
+
+def literal(node):
+    if isinstance(node, Int) and type(node.value) is int:
+        return True, node.value
+    elif isinstance(node, Boolean):
+        return True, node.value == 'true'
+    elif isinstance(node, Char):
+        return True, ord(node.value)
+    return False, None
+
+
+def node_for(value):
+    if type(value) is bool:
+        return Boolean('true' if value else 'false')
+    elif type(value) is int:
+        return Int(value)
+    return None
+
+
+def rounded(node):
+    return getattr(node, 'roundings', None) is not None
+
+
+def shape(node):
+    if isinstance(node, BinOp):
+        return node.symbol, shape(node.first), shape(node.second)
+    elif isinstance(node, UnOp):
+        return node.symbol, shape(node.first)
+    return type(node).__name__, node.value
+
+
+def name(node):
+    return node.id_.value if isinstance(node, ArrayElem) else node.value
+
+
+def modified(loop):
+    names = set()
+    for n in walk(loop):
+        if isinstance(n, Assign):
+            names.add(name(n.id_))
+        elif isinstance(n, For):
+            names.add(n.init.id_.value)
+        elif isinstance(n, (FuncCall, ProcCall)) and n.args is not None:
+            args = n.args.args
+            func = n.id_.value
+            if func not in BUILTINS:
+                targets = args
+            elif func in STORES:
+                position = STORES[func]
+                targets = args if position is None else args[position:position + 1]
+            else:
+                targets = []
+            names.update(name(a) for a in targets if isinstance(a, (Id, ArrayElem)))
+    return names
+
+
+def assigned(node):
+    if isinstance(node, Assign) and isinstance(node.id_, Id):
+        return {node.id_.value}
+    elif isinstance(node, For):
+        return {node.init.id_.value}
+    elif isinstance(node, (FuncCall, ProcCall)) and node.id_.value in ['read', 'readln'] and node.args is not None:
+        return {a.value for a in node.args.args if isinstance(a, Id)}
+    return set()
+
+
+class Optimizer(Visitor):
+    def __init__(self, ast, hoist=True):
+        self.ast = ast
+        self.hoist = hoist
+        self.folded = 0
+        self.removed = 0
+        self.hoisted = 0
+
+    def optimize(self):
+        self.visit(None, self.ast)
+        if self.hoist:
+            self.hoisted = Hoister(self.ast).hoist()
+        return self.ast
+
+    def visit_Program(self, parent, node):
+        for n in node.nodes:
+            self.visit(node, n)
+
+    def visit_VarDecl(self, parent, node):
+        for decl in node.decls:
+            self.visit(node, decl)
+
+    def visit_FuncImpl(self, parent, node):
+        self.visit(node, node.block)
+
+    def visit_ProcImpl(self, parent, node):
+        self.visit(node, node.block)
+
+    def visit_Block(self, parent, node):
+        if node.var_decls is not None:
+            self.visit(node, node.var_decls)
+        node.nodes = self.statements(node, node.nodes)
+        return [node]
+
+    def statements(self, parent, nodes):
+        result = []
+        for i, n in enumerate(nodes):
+            result.extend(self.visit(parent, n))
+            if result and isinstance(result[-1], JUMPS):
+                self.removed += len(nodes) - i - 1
+                break
+        return result
+
+    def branch(self, block):
+        if block is None:
+            return []
+        if len(block.symbols) == 0:
+            return block.nodes
+        return [block]
+
+    def visit_Decl(self, parent, node):
+        return [node]
+
+    def visit_ArrayDecl(self, parent, node):
+        if node.size is not None:
+            node.size = self.expr(node.size)
+        if node.elems is not None:
+            node.elems.elems = [self.expr(e) for e in node.elems.elems]
+        return [node]
+
+    def visit_Assign(self, parent, node):
+        if isinstance(node.id_, ArrayElem):
+            node.id_.index = self.expr(node.id_.index)
+        node.expr = self.expr(node.expr)
+        return [node]
+
+    def visit_If(self, parent, node):
+        node.cond = self.expr(node.cond)
+        self.visit(node, node.true)
+        if node.false is not None:
+            self.visit(node, node.false)
+        if isinstance(node.cond, Boolean):
+            self.removed += 1
+            taken = node.true if node.cond.value == 'true' else node.false
+            nodes = self.branch(taken)
+            if len(nodes) == 1 and isinstance(nodes[0], Block):
+                node.cond = Boolean('true')
+                node.true, node.false = taken, None
+                return [node]
+            return nodes
+        return [node]
+
+    def visit_While(self, parent, node):
+        node.cond = self.expr(node.cond)
+        if isinstance(node.cond, Boolean) and node.cond.value == 'false':
+            self.removed += 1
+            return []
+        self.visit(node, node.block)
+        return [node]
+
+    def visit_RepeatUntil(self, parent, node):
+        self.visit(node, node.block)
+        node.cond = self.expr(node.cond)
+        return [node]
+
+    def visit_For(self, parent, node):
+        node.init.expr = self.expr(node.init.expr)
+        node.to = self.expr(node.to)
+        self.visit(node, node.block)
+        return [node]
+
+    def visit_FuncCall(self, parent, node):
+        self.call(node)
+        return [node]
+
+    def visit_ProcCall(self, parent, node):
+        return self.visit_FuncCall(parent, node)
+
+    def visit_Id(self, parent, node):
+        return [node]
+
+    def visit_Break(self, parent, node):
+        return [node]
+
+    def visit_Continue(self, parent, node):
+        return [node]
+
+    def visit_Exit(self, parent, node):
+        if node.expr is not None:
+            node.expr = self.expr(node.expr)
+        return [node]
+
+    def call(self, node):
+        if node.args is None:
+            return
+        func = node.id_.value
+        if func in ['write', 'writeln', 'read', 'readln']:
+            # Output formatting depends on the argument's node type, so
+            # only the operands inside each argument are rewritten.
+            for a in node.args.args:
+                self.operands(a)
+        else:
+            node.args.args = [self.expr(a) for a in node.args.args]
+
+    def operands(self, node):
+        if isinstance(node, BinOp):
+            node.first = self.expr(node.first)
+            node.second = self.expr(node.second)
+        elif isinstance(node, UnOp):
+            node.first = self.expr(node.first)
+        elif isinstance(node, FuncCall):
+            self.call(node)
+        elif isinstance(node, ArrayElem):
+            node.index = self.expr(node.index)
+
+    def expr(self, node):
+        if isinstance(node, BinOp):
+            return self.binary(node)
+        elif isinstance(node, UnOp):
+            return self.unary(node)
+        elif isinstance(node, FuncCall):
+            return self.builtin(node)
+        elif isinstance(node, ArrayElem):
+            node.index = self.expr(node.index)
+        return node
+
+    def binary(self, node):
+        node.first = self.expr(node.first)
+        node.second = self.expr(node.second)
+        if rounded(node):
+            return node
+
+        first, a = literal(node.first)
+        second, b = literal(node.second)
+        if first and second and node.symbol in FOLDABLE:
+            if node.symbol in ['div', 'mod'] and b == 0:
+                return node
+            folded = node_for(node.op.apply(a, b))
+            if folded is not None:
+                self.folded += 1
+                return folded
+
+        for symbol, neutral, side in IDENTITIES:
+            if node.symbol != symbol:
+                continue
+            operand = node.second if side == 'second' else node.first
+            other = node.first if side == 'second' else node.second
+            if isinstance(operand, Int) and operand.value == neutral and not rounded(operand):
+                self.folded += 1
+                return other
+        return node
+
+    def unary(self, node):
+        node.first = self.expr(node.first)
+        if rounded(node):
+            return node
+        constant, value = literal(node.first)
+        if not constant:
+            return node
+        if node.symbol == '-' and isinstance(node.first, Int):
+            self.folded += 1
+            return Int(-value)
+        elif node.symbol == 'not' and isinstance(node.first, Boolean):
+            self.folded += 1
+            return Boolean('false' if value else 'true')
+        return node
+
+    def builtin(self, node):
+        self.call(node)
+        if rounded(node) or node.args is None or len(node.args.args) != 1:
+            return node
+        func, arg = node.id_.value, node.args.args[0]
+        if func == 'chr' and isinstance(arg, Int) and type(arg.value) is int and 0 <= arg.value < 0x110000:
+            self.folded += 1
+            return Char(chr(arg.value))
+        elif func == 'ord' and isinstance(arg, Char):
+            self.folded += 1
+            return Int(ord(arg.value))
+        return node
+
+
+class Hoister(Visitor):
+    def __init__(self, ast):
+        self.ast = ast
+        self.routine = None
+        self.assigned = set()
+        self.count = 0
+        self.hoisted = 0
+
+    def hoist(self):
+        self.visit(None, self.ast)
+        return self.hoisted
+
+    def visit_Program(self, parent, node):
+        for n in node.nodes:
+            self.visit(node, n)
+
+    def visit_VarDecl(self, parent, node):
+        pass
+
+    def visit_FuncImpl(self, parent, node):
+        self.routine = node.block
+        params = node.params.params if node.params is not None else []
+        self.assigned = {p.id_.value for p in params}
+        self.block(node.block)
+
+    def visit_ProcImpl(self, parent, node):
+        self.visit_FuncImpl(parent, node)
+
+    def visit_Block(self, parent, node):
+        self.routine = node
+        self.assigned = set()
+        self.block(node)
+
+    def block(self, node):
+        nodes = []
+        for n in node.nodes:
+            if isinstance(n, LOOPS):
+                nodes.extend(self.loop(n))
+                self.branch(n.block, assigned(n))
+            elif isinstance(n, If):
+                self.branch(n.true)
+                if n.false is not None:
+                    self.branch(n.false)
+            elif isinstance(n, Block):
+                self.block(n)
+            nodes.append(n)
+            self.assigned |= assigned(n)
+        node.nodes = nodes
+
+    def branch(self, node, names=frozenset()):
+        # A loop body or if branch may not run, so what it assigns is forgotten afterwards
+        outer = set(self.assigned)
+        self.assigned |= names
+        self.block(node)
+        self.assigned = outer
+
+    def loop(self, node):
+        self.names = modified(node)
+        self.temps = {}
+        self.assigns = []
+        if isinstance(node, For):
+            if not isinstance(node.to, (Int, Id)):
+                node.to = self.lift(node.to)
+        else:
+            node.cond = self.lift(node.cond)
+        for n in walk(node.block.nodes):
+            self.statement(n)
+        return self.assigns
+
+    def statement(self, node):
+        if isinstance(node, Assign):
+            if isinstance(node.id_, ArrayElem):
+                node.id_.index = self.lift(node.id_.index)
+            node.expr = self.lift(node.expr)
+        elif isinstance(node, (If, While, RepeatUntil)):
+            node.cond = self.lift(node.cond)
+        elif isinstance(node, For):
+            node.init.expr = self.lift(node.init.expr)
+            node.to = self.lift(node.to)
+        elif isinstance(node, Exit) and node.expr is not None:
+            node.expr = self.lift(node.expr)
+        elif isinstance(node, (FuncCall, ProcCall)) and node.args is not None:
+            self.call(node)
+
+    def call(self, node):
+        if node.id_.value in ['write', 'writeln', 'read', 'readln']:
+            # The argument's node type selects its output format
+            for a in node.args.args:
+                self.operands(a)
+        else:
+            node.args.args = [self.lift(a) for a in node.args.args]
+
+    def operands(self, node):
+        if isinstance(node, BinOp):
+            node.first = self.lift(node.first)
+            node.second = self.lift(node.second)
+        elif isinstance(node, UnOp):
+            node.first = self.lift(node.first)
+        elif isinstance(node, ArrayElem):
+            node.index = self.lift(node.index)
+        elif isinstance(node, FuncCall) and node.args is not None:
+            self.call(node)
+
+    def lift(self, node):
+        if isinstance(node, (BinOp, UnOp)):
+            type_ = self.invariant(node)
+            if type_ is not None:
+                return self.temp(node, type_)
+        self.operands(node)
+        return node
+
+    def invariant(self, node):
+        if rounded(node):
+            return None
+        if isinstance(node, Int):
+            return 'integer' if type(node.value) is int else None
+        elif isinstance(node, Real):
+            return 'real'
+        elif isinstance(node, Boolean):
+            return 'boolean'
+        elif isinstance(node, Id):
+            if getattr(node, 'depth', None) != LOCAL or node.value in self.names:
+                return None
+            # Hoisted code runs even when the loop does not, so it may only read assigned variables
+            if node.value not in self.assigned:
+                return None
+            type_ = self.routine.layout[node.slot].type_
+            return type_ if type_ in HOISTABLE else None
+        elif isinstance(node, UnOp):
+            type_ = self.invariant(node.first)
+            if node.symbol == 'not' and type_ == 'boolean':
+                return type_
+            elif node.symbol == '-' and type_ in ['integer', 'real']:
+                return type_
+        elif isinstance(node, BinOp):
+            if node.symbol in ['/', 'div', 'mod'] and not (isinstance(node.second, (Int, Real)) and node.second.value):
+                return None
+            first, second = self.invariant(node.first), self.invariant(node.second)
+            if first is None or second is None:
+                return None
+            if node.symbol in COMPARISONS:
+                return 'boolean'
+            elif node.symbol == '/' or 'real' in [first, second]:
+                return 'real'
+            elif node.symbol in ['+', '-', '*', 'div', 'mod']:
+                return 'integer'
+        return None
+
+    def temp(self, node, type_):
+        key = shape(node)
+        if key not in self.temps:
+            id_ = '_inv{}'.format(self.count)
+            self.count += 1
+            self.hoisted += 1
+            block = self.routine
+            slot = len(block.layout)
+            block.symbols.put(id_, type_, id(block), slot)
+            block.layout.append(block.symbols.get(id_))
+            if block.var_decls is None:
+                block.var_decls = VarDecl([])
+            block.var_decls.decls.append(Decl(Type(type_), self.local(id_, slot)))
+            self.assigns.append(Assign(self.local(id_, slot), node))
+            self.assigned.add(id_)
+            self.temps[key] = id_, slot
+        return self.local(*self.temps[key])
+
+    def local(self, id_, slot):
+        node = Id(id_)
+        node.depth = LOCAL
+        node.slot = slot
+        return node
@@ -0,0 +1,86 @@
+from concurrent.futures import ProcessPoolExecutor
+from lexer import Class, RegexLexer
+from parser import Parser, Program
+from symbolizer import Symbolizer, Globals
+import os
+
+BATCHES_PER_WORKER = 4
+MIN_PARTS = 16
+
+
+def skeleton(tokens):
+    classes = tokens.classes
+    begin, end, eof = Class.BEGIN.value, Class.END.value, Class.EOF.value
+    heads = {Class.FUNCTION.value, Class.PROCEDURE.value, Class.VAR.value, begin}
+    parts = []
+    i = 0
+    while classes[i] != eof:
+        if classes[i] not in heads:
+            return None
+        first = i
+        while classes[i] != begin:
+            if classes[i] == eof:
+                return None
+            i += 1
+        depth = 0
+        while True:
+            class_ = classes[i]
+            if class_ == begin:
+                depth += 1
+            elif class_ == end:
+                depth -= 1
+                if depth == 0:
+                    break
+            elif class_ == eof:
+                return None
+            i += 1
+        i += 1
+        if classes[i] == eof:
+            return None
+        i += 1
+        parts.append((tokens.starts[first], tokens.ends[i - 1]))
+    return parts
+
+
+def parse_batch(texts):
+    programs = []
+    for text in texts:
+        parser = Parser(RegexLexer(text).lex())
+        program = Program([parser.top_level()])
+        if parser.curr.class_ != Class.EOF:
+            parser.die_deriv(parser.program.__name__)
+        symbolizer = Symbolizer(program)
+        symbolizer.symbolize()
+        programs.append((program, symbolizer.refs))
+    return programs
+
+
+def serial(text):
+    ast = Parser(RegexLexer(text).lex()).parse()
+    Symbolizer(ast).symbolize()
+    return ast
+
+
+def parse(text, workers=None):
+    workers = workers or os.cpu_count() or 1
+    parts = skeleton(RegexLexer(text).compact())
+    if parts is None or len(parts) < MIN_PARTS or workers < 2:
+        return serial(text)
+
+    texts = [text[start:end] for start, end in parts]
+    count = min(len(texts), workers * BATCHES_PER_WORKER)
+    size = -(-len(texts) // count)
+    batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+    with ProcessPoolExecutor(workers) as executor:
+        results = list(executor.map(parse_batch, batches))
+
+    program = Program([])
+    program.symbols = Globals()
+    for programs in results:
+        for part, refs in programs:
+            program.nodes.extend(part.nodes)
+            for s in part.symbols:
+                program.symbols.put(s.id_, s.type_, id(program))
+            for ref in refs:
+                ref.slot = program.symbols.slot(ref.value)
+    return program
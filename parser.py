@@ -1,24 +1,41 @@
 from lexer import Class
-from functools import wraps
-import pickle
+from operators import binary, unary
 
 
 class Node:
-    pass
+    __slots__ = ()
+
+
+def walk(node):
+    if isinstance(node, list):
+        for n in node:
+            yield from walk(n)
+    elif isinstance(node, Node):
+        yield node
+        for c in type(node).__mro__:
+            for k in getattr(c, '__slots__', ()):
+                if k not in ('symbols', 'layout', 'roundings') and hasattr(node, k):
+                    yield from walk(getattr(node, k))
 
 
 class Program(Node):
+    __slots__ = ('nodes', 'symbols')
+
     def __init__(self, nodes):
         self.nodes = nodes
 
 
 class Decl(Node):
+    __slots__ = ('type_', 'id_')
+
     def __init__(self, type_, id_):
         self.type_ = type_
         self.id_ = id_
 
 
 class ArrayDecl(Node):
+    __slots__ = ('type_', 'id_', 'size', 'from_', 'to_', 'elems', 'symbols')
+
     def __init__(self, type_, id_, size, from_, to_, elems):
         self.type_ = type_
         self.id_ = id_
@@ -29,23 +46,31 @@ class ArrayDecl(Node):
 
 
 class ArrayElem(Node):
+    __slots__ = ('id_', 'index', 'roundings')
+
     def __init__(self, id_, index):
         self.id_ = id_
         self.index = index
 
 
 class VarDecl(Node):
+    __slots__ = ('decls',)
+
     def __init__(self, decls):
         self.decls = decls
 
 
 class Assign(Node):
+    __slots__ = ('id_', 'expr')
+
     def __init__(self, id_, expr):
         self.id_ = id_
         self.expr = expr
 
 
 class If(Node):
+    __slots__ = ('cond', 'true', 'false')
+
     def __init__(self, cond, true, false):
         self.cond = cond
         self.true = true
@@ -53,18 +78,24 @@ class If(Node):
 
 
 class While(Node):
+    __slots__ = ('cond', 'block')
+
     def __init__(self, cond, block):
         self.cond = cond
         self.block = block
 
 
 class RepeatUntil(Node):
+    __slots__ = ('cond', 'block')
+
     def __init__(self, cond, block):
         self.cond = cond
         self.block = block
 
 
 class For(Node):
+    __slots__ = ('init', 'to', 'reversed', 'block')
+
     def __init__(self, init, to, reversed, block):
         self.init = init
         self.to = to
@@ -73,6 +104,8 @@ class For(Node):
 
 
 class FuncImpl(Node):
+    __slots__ = ('type_', 'id_', 'params', 'block')
+
     def __init__(self, type_, id_, params, block):
         self.type_ = type_
         self.id_ = id_
@@ -81,12 +114,16 @@ class FuncImpl(Node):
 
 
 class FuncCall(Node):
+    __slots__ = ('id_', 'args', 'roundings')
+
     def __init__(self, id_, args):
         self.id_ = id_
         self.args = args
 
 
 class ProcImpl(Node):
+    __slots__ = ('id_', 'params', 'block')
+
     def __init__(self, id_, params, block):
         self.id_ = id_
         self.params = params
@@ -94,12 +131,16 @@ class ProcImpl(Node):
 
 
 class ProcCall(Node):
+    __slots__ = ('id_', 'args', 'roundings')
+
     def __init__(self, id_, args):
         self.id_ = id_
         self.args = args
 
 
 class Block(Node):
+    __slots__ = ('var_decls', 'is_main', 'nodes', 'symbols', 'layout')
+
     def __init__(self, var_decls, is_main, nodes):
         self.var_decls = var_decls
         self.is_main = is_main
@@ -107,137 +148,209 @@ class Block(Node):
 
 
 class Params(Node):
+    __slots__ = ('params', 'symbols')
+
     def __init__(self, params):
         self.params = params
 
 
 class Args(Node):
+    __slots__ = ('args',)
+
     def __init__(self, args):
         self.args = args
 
 
 class Elems(Node):
+    __slots__ = ('elems',)
+
     def __init__(self, elems):
         self.elems = elems
 
 
 class Break(Node):
-    pass
+    __slots__ = ()
 
 
 class Continue(Node):
-    pass
+    __slots__ = ()
 
 
 class Exit(Node):
+    __slots__ = ('expr',)
+
     def __init__(self, expr):
         self.expr = expr
 
 
 class Type(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 
 class Int(Node):
+    __slots__ = ('value', 'roundings')
+
     def __init__(self, value):
         self.value = value
 
 
 class Real(Node):
+    __slots__ = ('value', 'roundings')
+
     def __init__(self, value):
         self.value = value
 
 
 class Boolean(Node):
+    __slots__ = ('value', 'roundings')
+
     def __init__(self, value):
         self.value = value
 
 
 class Char(Node):
+    __slots__ = ('value', 'roundings')
+
     def __init__(self, value):
         self.value = value
 
 
 class String(Node):
+    __slots__ = ('value', 'roundings')
+
     def __init__(self, value):
         self.value = value
 
 
 class Id(Node):
+    __slots__ = ('value', 'roundings', 'depth', 'slot')
+
     def __init__(self, value):
         self.value = value
 
 
 class BinOp(Node):
+    __slots__ = ('symbol', 'op', 'first', 'second', 'roundings')
+
     def __init__(self, symbol, first, second, roundings=None):
         self.symbol = symbol
+        self.op = binary(symbol)
         self.first = first
         self.second = second
         self.roundings = roundings
 
 
 class UnOp(Node):
+    __slots__ = ('symbol', 'op', 'first', 'roundings')
+
     def __init__(self, symbol, first):
         self.symbol = symbol
+        self.op = unary(symbol)
         self.first = first
 
 
+LOOKAHEAD = 64
+
+
+class Lookahead:
+    def __init__(self, tokens, size=LOOKAHEAD):
+        self.source = iter(tokens)
+        self.buffer = [None] * size
+        self.mask = size - 1
+        self.start = 0
+        self.end = 0
+
+    def __getitem__(self, index):
+        while index >= self.end:
+            self.fill()
+        if index < self.start:
+            raise IndexError(index)
+        return self.buffer[index & self.mask]
+
+    def fill(self):
+        token = next(self.source, None)
+        if token is None:
+            raise IndexError(self.end)
+        if self.end - self.start == len(self.buffer):
+            self.start += 1
+        self.buffer[self.end & self.mask] = token
+        self.end += 1
+
+
+COMPARE = 3
+
+BINDING = {
+    Class.OR: 1,
+    Class.AND: 2,
+    Class.EQ: COMPARE,
+    Class.NEQ: COMPARE,
+    Class.LT: COMPARE,
+    Class.GT: COMPARE,
+    Class.LTE: COMPARE,
+    Class.GTE: COMPARE,
+    Class.PLUS: 4,
+    Class.MINUS: 4,
+    Class.COLON: 4,
+    Class.STAR: 5,
+    Class.FWDSLASH: 5,
+    Class.DIV: 5,
+    Class.MOD: 5,
+    Class.XOR: 5,
+}
+
+
 class Parser:
     def __init__(self, tokens):
+        if not hasattr(tokens, '__getitem__'):
+            tokens = Lookahead(tokens)
         self.tokens = tokens
-        self.curr = tokens.pop(0)
+        self.pos = 0
+        self.curr = tokens[0]
         self.prev = None
 
-    def restorable(call):
-        @wraps(call)
-        def wrapper(self, *args, **kwargs):
-            state = pickle.dumps(self.__dict__)
-            result = call(self, *args, **kwargs)
-            self.__dict__ = pickle.loads(state)
-            return result
-
-        return wrapper
-
     def eat(self, class_):
         if self.curr.class_ == class_:
             self.prev = self.curr
-            self.curr = self.tokens.pop(0)
+            self.pos += 1
+            self.curr = self.tokens[self.pos]
         else:
             self.die_type(class_.name, self.curr.class_.name)
 
     def program(self):
         nodes = []
         while self.curr.class_ != Class.EOF:
-            if self.curr.class_ == Class.VAR:
-                nodes.append(self.var_decls(is_main=True))
-            elif self.curr.class_ == Class.FUNCTION:
-                nodes.append(self.func_impl())
-            elif self.curr.class_ == Class.PROCEDURE:
-                nodes.append(self.proc_impl())
-            elif self.curr.class_ == Class.BEGIN:
-                self.eat(Class.BEGIN)
-                nodes.append(self.block(is_main=True))
-                self.eat(Class.END)
-                self.eat(Class.DOT)
-            else:
-                self.die_deriv(self.program.__name__)
+            nodes.append(self.top_level())
         return Program(nodes)
 
+    def top_level(self):
+        if self.curr.class_ == Class.VAR:
+            return self.var_decls(is_main=True)
+        elif self.curr.class_ == Class.FUNCTION:
+            return self.func_impl()
+        elif self.curr.class_ == Class.PROCEDURE:
+            return self.proc_impl()
+        elif self.curr.class_ == Class.BEGIN:
+            self.eat(Class.BEGIN)
+            block = self.block(is_main=True)
+            self.eat(Class.END)
+            self.eat(Class.DOT)
+            return block
+        else:
+            self.die_deriv(self.program.__name__)
+
     def id_(self):
         is_array_elem = self.prev.class_ != Class.TYPE
+        is_call = self.prev.class_ not in [Class.TYPE, Class.FUNCTION, Class.PROCEDURE]
         id_ = Id(self.curr.lexeme)
         self.eat(Class.ID)
-        if self.curr.class_ == Class.LPAREN and self.is_func_call():
+        if self.curr.class_ == Class.LPAREN and is_call:
             self.eat(Class.LPAREN)
             args = self.args()
             self.eat(Class.RPAREN)
             return FuncCall(id_, args)
-        elif self.curr.class_ == Class.LPAREN and self.is_func_call():
-            self.eat(Class.LPAREN)
-            args = self.args()
-            self.eat(Class.RPAREN)
-            return ProcCall(id_, args)
         elif self.curr.class_ == Class.LBRACKET and is_array_elem:
             self.eat(Class.LBRACKET)
             index = self.expr()
@@ -245,11 +358,7 @@ class Parser:
             id_ = ArrayElem(id_, index)
         if self.curr.class_ == Class.ASSIGN:
             self.eat(Class.ASSIGN)
-            expr = None
-            if self.is_compare():
-                expr = self.compare()
-            else:
-                expr = self.expr()
+            expr = self.expr()
             return Assign(id_, expr)
         else:
             return id_
@@ -394,7 +503,7 @@ class Parser:
 
     def if_(self):
         self.eat(Class.IF)
-        cond = self.logic()
+        cond = self.expr()
         self.eat(Class.THEN)
         self.eat(Class.BEGIN)
         true = self.block()
@@ -411,7 +520,7 @@ class Parser:
 
     def while_(self):
         self.eat(Class.WHILE)
-        cond = self.logic()
+        cond = self.expr()
         self.eat(Class.DO)
         self.eat(Class.BEGIN)
         block = self.block()
@@ -423,7 +532,7 @@ class Parser:
         self.eat(Class.REPEAT)
         block = self.block()
         self.eat(Class.UNTIL)
-        cond = self.logic()
+        cond = self.expr()
         self.eat(Class.SEMICOLON)
         return RepeatUntil(cond, block)
 
@@ -558,14 +667,14 @@ class Parser:
             first = None
             if self.curr.class_ == Class.LPAREN:
                 self.eat(Class.LPAREN)
-                first = self.logic()
+                first = self.expr()
                 self.eat(Class.RPAREN)
             else:
                 first = self.factor()
             return UnOp(op.lexeme, first)
         elif self.curr.class_ == Class.LPAREN:
             self.eat(Class.LPAREN)
-            first = self.logic()
+            first = self.expr()
             self.eat(Class.RPAREN)
             return first
         elif self.curr.class_ == Class.SEMICOLON:
@@ -573,138 +682,31 @@ class Parser:
         else:
             self.die_deriv(self.factor.__name__)
 
-    def term(self):
+    def expr(self, power=0):
         first = self.factor()
-        while self.curr.class_ in [Class.STAR, Class.FWDSLASH, Class.DIV, Class.MOD, Class.XOR]:
-            if self.curr.class_ == Class.STAR:
-                op = self.curr.lexeme
-                self.eat(Class.STAR)
-                second = self.factor()
-                first = BinOp(op, first, second)
-            elif self.curr.class_ == Class.FWDSLASH:
-                op = self.curr.lexeme
-                self.eat(Class.FWDSLASH)
-                second = self.factor()
-                first = BinOp(op, first, second)
-            elif self.curr.class_ == Class.DIV:
-                op = self.curr.lexeme
-                self.eat(Class.DIV)
-                second = self.factor()
-                first = BinOp(op, first, second)
-            elif self.curr.class_ == Class.MOD:
-                op = self.curr.lexeme
-                self.eat(Class.MOD)
-                second = self.factor()
-                first = BinOp(op, first, second)
-            elif self.curr.class_ == Class.XOR:
-                op = self.curr.lexeme
-                self.eat(Class.XOR)
-                second = self.factor()
-                first = BinOp(op, first, second)
-        return first
-
-    def expr(self):
-        first = self.term()
-        while self.curr.class_ in [Class.PLUS, Class.MINUS]:
-            if self.curr.class_ == Class.PLUS:
-                op = self.curr.lexeme
-                self.eat(Class.PLUS)
-                second = self.term()
-                first = BinOp(op, first, second)
-            elif self.curr.class_ == Class.MINUS:
-                op = self.curr.lexeme
-                self.eat(Class.MINUS)
-                second = self.term()
-                first = BinOp(op, first, second)
-
-        if self.curr.class_ == Class.COLON:
-            self.eat(Class.COLON)
-            first.roundings = []
-            first.roundings.append(Int(self.curr.lexeme))
-            self.eat(Class.INT)
-            self.eat(Class.COLON)
-            first.roundings.append(Int(self.curr.lexeme))
-            self.eat(Class.INT)
-
-        return first
-
-    def compare(self):
-        first = self.expr()
-        if self.curr.class_ == Class.EQ:
+        compared = False
+        while True:
+            class_ = self.curr.class_
+            binding = BINDING.get(class_)
+            if binding is None or binding <= power:
+                return first
+            if class_ == Class.COLON:
+                self.eat(Class.COLON)
+                first.roundings = []
+                first.roundings.append(Int(self.curr.lexeme))
+                self.eat(Class.INT)
+                self.eat(Class.COLON)
+                first.roundings.append(Int(self.curr.lexeme))
+                self.eat(Class.INT)
+                continue
+            if binding == COMPARE:
+                if compared:
+                    return first
+                compared = True
             op = self.curr.lexeme
-            self.eat(Class.EQ)
-            second = self.expr()
-            return BinOp(op, first, second)
-        elif self.curr.class_ == Class.NEQ:
-            op = self.curr.lexeme
-            self.eat(Class.NEQ)
-            second = self.expr()
-            return BinOp(op, first, second)
-        elif self.curr.class_ == Class.LT:
-            op = self.curr.lexeme
-            self.eat(Class.LT)
-            second = self.expr()
-            return BinOp(op, first, second)
-        elif self.curr.class_ == Class.GT:
-            op = self.curr.lexeme
-            self.eat(Class.GT)
-            second = self.expr()
-            return BinOp(op, first, second)
-        elif self.curr.class_ == Class.LTE:
-            op = self.curr.lexeme
-            self.eat(Class.LTE)
-            second = self.expr()
-            return BinOp(op, first, second)
-        elif self.curr.class_ == Class.GTE:
-            op = self.curr.lexeme
-            self.eat(Class.GTE)
-            second = self.expr()
-            return BinOp(op, first, second)
-        else:
-            return first
-
-    def logic_term(self):
-        first = self.compare()
-        while self.curr.class_ == Class.AND:
-            op = self.curr.lexeme
-            self.eat(Class.AND)
-            second = self.compare()
+            self.eat(class_)
+            second = self.expr(binding)
             first = BinOp(op, first, second)
-        return first
-
-    def logic(self):
-        first = self.logic_term()
-        while self.curr.class_ == Class.OR:
-            op = self.curr.lexeme
-            self.eat(Class.OR)
-            second = self.logic_term()
-            first = BinOp(op, first, second)
-        return first
-
-    @restorable
-    def is_func_call(self):
-        try:
-            self.eat(Class.LPAREN)
-            self.args()
-            self.eat(Class.RPAREN)
-
-            if self.curr.class_ == Class.SEMICOLON:
-                return self.curr.class_ != Class.BEGIN
-            else:
-                return True
-        except:
-            return False
-
-    @restorable
-    def is_compare(self):
-        try:
-            self.id_()
-            curr = self.curr.class_
-            if curr in [Class.EQ, Class.NEQ, Class.GTE, Class.LTE, Class.GT, Class.LT]:
-                return True
-            return False
-        except:
-            return False
 
     def parse(self):
         return self.program()
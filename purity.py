@@ -0,0 +1,102 @@
+from collections import OrderedDict
+
+from parser import walk, Id, Assign, FuncCall, ProcCall, FuncImpl, ProcImpl, ArrayElem
+from symbolizer import BUILTINS, GLOBAL
+from visitor import Visitor
+
+SCALARS = ['integer', 'real', 'boolean', 'char']
+
+IO = ['write', 'writeln', 'read', 'readln']
+
+MEMO_SIZE = 1 << 16
+
+MISSING = object()
+
+
+class Purity(Visitor):
+    def __init__(self, ast):
+        self.ast = ast
+        self.routines = {}
+        self.calls = {}
+
+    def analyze(self):
+        self.visit(None, self.ast)
+        pure = {name for name, impl in self.routines.items() if self.local(impl)}
+        changed = True
+        while changed:
+            changed = False
+            for name in list(pure):
+                if not self.calls[name] <= pure:
+                    pure.remove(name)
+                    changed = True
+        return {name for name in pure if isinstance(self.routines[name], FuncImpl)}
+
+    def visit_Program(self, parent, node):
+        for n in node.nodes:
+            self.visit(node, n)
+
+    def visit_FuncImpl(self, parent, node):
+        self.routines[node.id_.value] = node
+        self.calls[node.id_.value] = set()
+
+    def visit_ProcImpl(self, parent, node):
+        self.visit_FuncImpl(parent, node)
+
+    def visit_VarDecl(self, parent, node):
+        pass
+
+    def visit_Block(self, parent, node):
+        pass
+
+    def local(self, impl):
+        if impl.params is not None and any(p.type_.value not in SCALARS for p in impl.params.params):
+            return False
+        calls = self.calls[impl.id_.value]
+        targets = set()
+        for n in walk(impl.block):
+            if isinstance(n, (FuncCall, ProcCall)):
+                func = n.id_.value
+                if func in IO:
+                    return False
+                if func not in BUILTINS:
+                    if func not in self.routines:
+                        return False
+                    calls.add(func)
+                targets.add(id(n.id_))
+            elif isinstance(n, Assign) and not isinstance(n.id_, ArrayElem) and n.id_.value == impl.id_.value:
+                return False
+        for n in walk(impl.block):
+            if isinstance(n, Id) and id(n) not in targets and getattr(n, 'depth', GLOBAL) == GLOBAL:
+                return False
+        return True
+
+
+class Memo:
+    def __init__(self, size=MEMO_SIZE):
+        self.size = size
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.table.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return value
+        self.table.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.table[key] = value
+        if len(self.table) > self.size:
+            self.table.popitem(last=False)
+
+    def stats(self):
+        calls = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.table),
+            'rate': self.hits / calls if calls else 0.0,
+        }
@@ -1,60 +1,65 @@
+from array import array
+from console import Console
 from parser import Id, Int, Real, Char, String, Boolean, ArrayElem, BinOp, Break, Continue, Exit
+from native import Native
+from purity import MEMO_SIZE, MISSING, Memo, Purity
 from symbolizer import Symbol
+from tiering import THRESHOLD, Tiering
+from vectorizer import AVAILABLE, Vectorizer
 from visitor import Visitor
 
 
+def allocate(type_, length):
+    if type_ == 'real':
+        return array('d', [0.0]) * length
+    elif type_ == 'boolean' or type_ == 'char':
+        return bytearray(length)
+    return array('q', [0]) * length
+
+
+def convert(type_, word):
+    if type_ == 'integer':
+        return int(word)
+    elif type_ == 'real':
+        return float(word)
+    elif type_ == 'char':
+        return ord(word[0])
+    return None
+
+
 class Runner(Visitor):
-    def __init__(self, ast):
+    def __init__(self, ast, console=None, memo=MEMO_SIZE, vectorize=True, native=False, threshold=THRESHOLD):
         self.ast = ast
-        self.global_ = {}
-        self.local = {}
-        self.scope = {}
-        self.call_stack = []
-        self.search_new_call = True
+        self.console = console or Console()
+        self.memo = Memo(memo)
+        self.pure = Purity(ast).analyze() if memo else set()
+        self.vectorizer = Vectorizer(self) if vectorize and AVAILABLE else None
+        self.native = Native(ast).build() if native else {}
+        self.tiering = Tiering(self, threshold)
+        self.frames = [[], []]
+        self.pools = {}
         self.return_ = False
         self.input_picked = False
 
     def get_symbol(self, node):
-        recursion = self.is_recursion()
-        ref_call = -2 if not self.search_new_call else -1
-        ref_scope = -2 if recursion and not self.search_new_call else -1
-        id_ = node.value
-        if len(self.call_stack) > 0:
-            fun = self.call_stack[ref_call]
-            for scope in reversed(self.scope[fun]):
-                if scope in self.local:
-                    curr_scope = self.local[scope][ref_scope]
-                    if id_ in curr_scope:
-                        return curr_scope[id_]
-        return self.global_[id_]
-
-    def init_scope(self, node):
-        fun = self.call_stack[-1]
-        if fun not in self.scope:
-            self.scope[fun] = []
-        scope = id(node)
-        if scope not in self.local:
-            self.local[scope] = []
-        self.local[scope].append({})
-        for s in node.symbols:
-            self.local[scope][-1][s.id_] = s.copy()
+        return self.frames[node.depth][node.slot]
 
-    def clear_scope(self, node):
-        scope = id(node)
-        self.local[scope].pop()
+    def enter(self, block):
+        pool = self.pools.get(id(block))
+        if pool:
+            return pool.pop()
+        return [s.copy() for s in block.layout]
 
-    def is_recursion(self):
-        if len(self.call_stack) > 0:
-            curr_call = self.call_stack[-1]
-            prev_calls = self.call_stack[:-1]
-            for call in reversed(prev_calls):
-                if call == curr_call:
-                    return True
-        return False
+    def leave(self, block, frame):
+        if id(block) not in self.pools:
+            self.pools[id(block)] = []
+        self.pools[id(block)].append(frame)
 
     def visit_Program(self, parent, node):
+        globals_ = [None] * node.symbols.size()
         for s in node.symbols:
-            self.global_[s.id_] = s.copy()
+            globals_[s.slot] = s.copy()
+        self.frames[0] = globals_
         for n in node.nodes:
             self.visit(node, n)
 
@@ -68,29 +73,44 @@ class Runner(Visitor):
 
     def visit_ArrayDecl(self, parent, node):
         id_ = self.get_symbol(node.id_)
-        id_.symbols = node.symbols
-        size, elems = node.size, node.elems
-        if elems is not None:
-            self.visit(node, elems)
+        if node.from_ is not None:
+            id_.offset = node.from_.value
+            length = node.to_.value - node.from_.value + 1
         else:
-            if size is None:
-                size = node.to_.value - node.from_.value + 2
-
-            for i in range(size):
-                id_.symbols.put(i, id_.type_, None)
-                id_.symbols.get(i).value = None
+            id_.offset = 0
+            length = 0
+            if node.size is not None:
+                length = self.value(self.visit(node, node.size))
+        id_.symbols = allocate(id_.type_, length)
+        if node.elems is not None:
+            self.visit(node, node.elems)
 
     def visit_ArrayElem(self, parent, node):
         id_ = self.get_symbol(node.id_)
-        index = self.visit(node, node.index)
-        return id_.symbols.get(index.value)
+        index = self.value(self.visit(node, node.index))
+        value = id_.symbols[index - id_.offset]
+        if id_.type_ == 'boolean':
+            return value != 0
+        return value
+
+    def store(self, node, value):
+        id_ = self.get_symbol(node.id_)
+        index = self.value(self.visit(node, node.index))
+        if isinstance(value, str):
+            value = ord(value)
+        id_.symbols[index - id_.offset] = value
+
+    def value(self, value):
+        if isinstance(value, Symbol):
+            return value.value
+        return value
 
     def visit_Assign(self, parent, node):
+        if isinstance(node.id_, ArrayElem):
+            self.store(node.id_, self.value(self.visit(node, node.expr)))
+            return
         id_ = self.visit(node, node.id_)
-        value = self.visit(node, node.expr)
-        if isinstance(value, Symbol):
-            value = value.value
-        id_.value = value
+        id_.value = self.value(self.visit(node, node.expr))
 
     def visit_If(self, parent, node):
         cond = self.visit(node, node.cond)
@@ -98,69 +118,85 @@ class Runner(Visitor):
             cond = cond.value
 
         if cond:
-            self.init_scope(node.true)
-            result = self.visit(node, node.true)
-            self.clear_scope(node.true)
-            return result
+            return self.visit(node, node.true)
         else:
             if node.false is not None:
-                self.init_scope(node.false)
-                result = self.visit(node, node.false)
-                self.clear_scope(node.false)
-                return result
+                return self.visit(node, node.false)
 
     def visit_While(self, parent, node):
+        compiled = self.tiering.compiled.get(node)
+        if compiled is not None:
+            return compiled()
+        heat, limit = self.tiering.enter(node)
         cond = self.visit(node, node.cond)
         while cond:
-            self.init_scope(node.block)
             self.visit(node, node.block)
-            self.clear_scope(node.block)
+            heat += 1
+            if heat == limit:
+                compiled = self.tiering.promote(node, heat)
+                if compiled is not None:
+                    return compiled()
             cond = self.visit(node, node.cond)
+        self.tiering.leave(node, heat)
 
     def visit_RepeatUntil(self, parent, node):
+        compiled = self.tiering.compiled.get(node)
+        if compiled is not None:
+            return compiled()
+        heat, limit = self.tiering.enter(node)
         while True:
-            self.init_scope(node.block)
             self.visit(node, node.block)
-            self.clear_scope(node.block)
 
             cond = self.visit(node, node.cond)
             if cond or self.return_:
                 self.return_ = False
                 break
+            heat += 1
+            if heat == limit:
+                compiled = self.tiering.promote(node, heat)
+                if compiled is not None:
+                    return compiled()
+        self.tiering.leave(node, heat)
 
     def visit_For(self, parent, node):
+        compiled = self.tiering.compiled.get(node)
+        if compiled is not None:
+            return compiled()
         result = None
         self.visit(node, node.init)
+        var = self.get_symbol(node.init.id_)
+        to = self.value(self.visit(node, node.to))
 
-        if isinstance(node.to, Id):
-            to = self.get_symbol(node.to).value
-        else:
-            to = self.visit(node, node.to)
+        if self.vectorizer is not None and self.vectorizer.run(node, var, to):
+            self.input_picked = False
+            return None
 
         if not node.reversed:
-            cond = self.get_symbol(node.init.id_).value <= to
+            cond = var.value <= to
         else:
-            cond = self.get_symbol(node.init.id_).value >= to
+            cond = var.value >= to
 
+        heat, limit = self.tiering.enter(node)
         while cond and not self.return_ and not self.input_picked:
-            self.init_scope(node.block)
             result = self.visit(node, node.block)
-            self.clear_scope(node.block)
 
             if result is not None:
                 break
 
-            if isinstance(node.to, Id):
-                to = self.get_symbol(node.to).value
-            else:
-                to = self.visit(node, node.to)
             if not node.reversed:
-                cond = self.get_symbol(node.init.id_).value < to
-                self.get_symbol(node.init.id_).value += 1
+                cond = var.value < to
+                var.value += 1
             else:
-                cond = self.get_symbol(node.init.id_).value > to
-                self.get_symbol(node.init.id_).value -= 1
+                cond = var.value > to
+                var.value -= 1
+
+            heat += 1
+            if heat == limit:
+                compiled = self.tiering.promote(node, heat)
+                if compiled is not None:
+                    return compiled((var, to, cond))
 
+        self.tiering.leave(node, heat)
         self.input_picked = False
         return result
 
@@ -190,14 +226,15 @@ class Runner(Visitor):
                     output += a.value
                 elif isinstance(a, String):
                     output += a.value
-                elif isinstance(a, Id) or isinstance(a, ArrayElem):
+                elif isinstance(a, ArrayElem):
+                    value = self.visit(node.args, a)
+                    if self.get_symbol(a.id_).type_ == 'char':
+                        value = chr(value)
+                    output += str(value)
+                elif isinstance(a, Id):
                     id_ = self.visit(node.args, a)
                     if hasattr(id_, 'symbols') and id_.type_ == 'char':
-                        elems = id_.symbols
-                        ints = [s.value for s in elems]
-                        non_nulls = [i for i in ints if i is not None]
-                        chars = [chr(i) for i in non_nulls]
-                        value = ''.join(chars)
+                        value = id_.symbols.replace(b'\0', b'').decode('latin-1')
                     else:
                         value = id_.value
                         if id_.type_ == 'char':
@@ -210,39 +247,34 @@ class Runner(Visitor):
                         output += format.format(value)
                     else:
                         output += str(value)
-            print(output, end=('' if func == 'write' else '\n'))
+            self.console.write(output if func == 'write' else output + '\n')
         elif func == 'read':
-            inputs = input().split()
-            symbol = self.get_symbol(args[0].id_)
+            inputs = self.console.tokens()
+            symbol = self.get_symbol(args[0] if isinstance(args[0], Id) else args[0].id_)
             for i, a in enumerate(inputs):
-                element = symbol.symbols.symbols[i + 1]
-                type_ = element.type_
-                if type_ == 'integer':
-                    element.value = int(inputs[i])
-                elif type_ == 'real':
-                    element.value = float(inputs[i])
-                elif type_ == 'char':
-                    element.value = ord(inputs[i][0])
+                value = convert(symbol.type_, a)
+                if value is not None:
+                    symbol.symbols[i + 1 - symbol.offset] = value
             self.input_picked = True
         elif func == 'readln':
-            inputs = input().split()
+            inputs = self.console.tokens()
             for i, a in enumerate(args):
+                if isinstance(a, ArrayElem):
+                    self.store(a, convert(self.get_symbol(a.id_).type_, inputs[i]))
+                    continue
                 id_ = self.visit(node.args, args[i])
                 symbol = self.get_symbol(a)
                 type_ = symbol.type_
-                if type_ == 'integer':
+                if hasattr(id_, 'symbols'):
+                    # A whole array takes the word one character code per element
+                    for j, c in enumerate(inputs[i]):
+                        id_.symbols[j] = ord(c)
+                elif type_ == 'integer':
                     id_.value = int(inputs[i])
                 elif type_ == 'real':
                     id_.value = float(inputs[i])
                 elif type_ == 'char':
                     id_.value = ord(inputs[i][0])
-                elif type_ == 'string':
-                    word = inputs[i]
-                    length = len(id_.symbols)
-                    for c in word:
-                        id_.symbols.put(length, id_.type_, None)
-                        id_.symbols.get(length).value = ord(c)
-                        length += 1
         elif func == 'chr':
             a = args[0]
             if isinstance(a, Int):
@@ -264,6 +296,8 @@ class Runner(Visitor):
                 return len(a.value)
             elif isinstance(a, Id):
                 id_ = self.visit(node.args, a)
+                if isinstance(id_.symbols, bytearray):
+                    return len(id_.symbols) - id_.symbols.count(0)
                 return len(id_.symbols)
         elif func == 'strcat':
             a, b = args[0], args[1]
@@ -271,43 +305,51 @@ class Runner(Visitor):
             values = []
             if isinstance(b, Id):
                 src = self.get_symbol(b)
-                elems = [s.value for s in src.symbols]
-                non_nulls = [c for c in elems if c is not None]
-                values = [c for c in non_nulls]
+                values = [c for c in src.symbols if c]
             elif isinstance(b, String):
                 values = [ord(c) for c in b.value]
-            i = len(dest.symbols)
-            for v in values:
-                dest.symbols.put(i, dest.type_, None)
-                dest.symbols.get(i).value = v
-                i += 1
+            end = len(dest.symbols.rstrip(b'\0'))
+            dest.symbols[end:end + len(values)] = bytes(values)
         else:
-            impl = self.global_[func]
-            self.call_stack.append(func)
-            self.init_scope(impl.block)
-            self.visit(node, node.args)
-            result = self.visit(node, impl.block)
-            self.clear_scope(impl.block)
-            self.call_stack.pop()
+            impl = self.get_symbol(node.id_)
+            return self.invoke(node, func, impl, self.visit(node, node.args))
+
+    def invoke(self, node, func, impl, args):
+        if func in self.pure:
+            # 2 and 2.0 hash alike but print differently, so the type is part of the key
+            key = (func, tuple((type(a), a) for a in args))
+            result = self.memo.get(key)
+            if result is not MISSING:
+                return result
+
+        result = MISSING
+        if func in self.native:
+            result = self.native[func].call(args)
+        if result is MISSING:
+            caller = self.frames[1]
+            frame = self.enter(impl.block)
+            self.frames[1] = frame
+            for p, a in zip(impl.params.params, args):
+                self.get_symbol(p.id_).value = a
+            body = self.tiering.call(impl.block)
+            result = body() if body is not None else self.visit(node, impl.block)
+            self.frames[1] = caller
+            self.leave(impl.block, frame)
+
             self.return_ = False
-            return result
+        if func in self.pure:
+            self.memo.put(key, result)
+        return result
 
     def visit_Block(self, parent, node):
         if node.is_main:
-            self.call_stack.append('main')
-            self.init_scope(node)
+            self.frames[1] = self.enter(node)
 
         result = None
-        scope = id(node)
-        fun = self.call_stack[-1]
-        self.scope[fun].append(scope)
 
         if node.var_decls is not None:
             self.visit(node, node.var_decls)
 
-        if len(self.local[scope]) > 5:
-            exit(0)
-
         for n in node.nodes:
             if self.return_:
                 break
@@ -317,51 +359,29 @@ class Runner(Visitor):
             elif isinstance(n, Continue):
                 continue
             elif isinstance(n, Exit):
-                self.return_ = True
                 if n.expr is not None:
-                    result = self.visit(n, n.expr)
+                    result = self.value(self.visit(n, n.expr))
+                self.return_ = True
                 break
             else:
                 result = self.visit(node, n)
 
-        self.scope[fun].pop()
-
-        if node.is_main:
-            self.clear_scope(node)
-            self.call_stack.pop()
-
         return result
 
     def visit_Params(self, parent, node):
         pass
 
     def visit_Args(self, parent, node):
-        fun_parent = self.call_stack[-2]
-        impl = self.global_[fun_parent]
-        self.search_new_call = False
-
-        if fun_parent is 'main':
-            args = [self.visit(impl, a) for a in node.args]
-        else:
-            args = [self.visit(impl.block, a) for a in node.args]
-
-        args = [a.value if isinstance(a, Symbol) else a for a in args]
-        fun_child = self.call_stack[-1]
-        impl = self.global_[fun_child]
-        scope = id(impl.block)
-        self.scope[fun_child].append(scope)
-        self.search_new_call = True
-        for p, a in zip(impl.params.params, args):
-            id_ = self.visit(impl.block, p.id_)
-            id_.value = a
-        self.scope[fun_child].pop()
+        args = [self.visit(node, a) for a in node.args]
+        return [a.value if isinstance(a, Symbol) else a for a in args]
 
     def visit_Elems(self, parent, node):
         id_ = self.get_symbol(parent.id_)
+        if len(id_.symbols) < len(node.elems):
+            id_.symbols.extend(allocate(id_.type_, len(node.elems) - len(id_.symbols)))
         for i, e in enumerate(node.elems):
-            value = self.visit(node, e)
-            id_.symbols.put(i, id_.type_, None)
-            id_.symbols.get(i).value = value
+            value = self.value(self.visit(node, e))
+            id_.symbols[i] = ord(value) if isinstance(value, str) else value
 
     def visit_Break(self, parent, node):
         pass
@@ -397,55 +417,24 @@ class Runner(Visitor):
         first = self.visit(node, node.first)
         if isinstance(first, Symbol):
             first = first.value
+        op = node.op
+        if op.short is not None and (first != 0) == op.short:
+            return op.short
         second = self.visit(node, node.second)
         if isinstance(second, Symbol):
             second = second.value
-        if node.symbol == '+':
-            return first + second
-        elif node.symbol == '-':
-            return first - second
-        elif node.symbol == '*':
-            return first * second
-        elif node.symbol == '/':
-            return first / second
-        elif node.symbol == 'div':
-            return int(first) // int(second)
-        elif node.symbol == 'mod':
-            return first % second
-        elif node.symbol == '=':
-            return first == second
-        elif node.symbol == '<>':
-            return first != second
-        elif node.symbol == '<':
-            return first < second
-        elif node.symbol == '>':
-            return first > second
-        elif node.symbol == '<=':
-            return first <= second
-        elif node.symbol == '>=':
-            return first >= second
-        elif node.symbol == 'and':
-            bool_first = first != 0
-            bool_second = second != 0
-            return bool_first and bool_second
-        elif node.symbol == 'or':
-            bool_first = first != 0
-            bool_second = second != 0
-            return bool_first or bool_second
-        else:
-            return None
+        return op.apply(first, second)
 
     def visit_UnOp(self, parent, node):
         first = self.visit(node, node.first)
         if isinstance(first, Symbol):
             first = first.value
-        if node.symbol == '-':
-            return -first
-        elif node.symbol == 'not':
-            bool_first = first != 0
-            return not bool_first
-        else:
-            return None
+        return node.op.apply(first)
 
     def run(self):
-        self.visit(None, self.ast)
\ No newline at end of file
+        try:
+            self.visit(None, self.ast)
+        except RecursionError:
+            raise SystemExit("Stack overflow: recursion too deep for the Runner, use the VM")
+        finally:
+            self.console.flush()
\ No newline at end of file
@@ -0,0 +1,49 @@
+DEFAULTS = {'integer': 0, 'real': 0.0, 'boolean': False, 'char': 0}
+
+BUILTINS = ['write', 'writeln', 'read', 'readln', 'chr', 'ord', 'strlen', 'strcat']
+
+
+def char(value):
+    return chr(value) if isinstance(value, int) else str(value)
+
+
+def text(storage):
+    return ''.join([char(c) for c in storage if c])
+
+
+def ordinal(value):
+    return ord(value) if isinstance(value, str) else value
+
+
+def concat(storage, codes):
+    end = len(storage)
+    while end > 0 and not storage[end - 1]:
+        end -= 1
+    storage[end:end + len(codes)] = codes
+
+
+def chars(storage, word):
+    codes = [ord(c) for c in word]
+    storage[:len(codes)] = codes
+
+
+class Var:
+    __slots__ = ('slot', 'type_', 'array', 'offset')
+
+    def __init__(self, slot, type_):
+        self.slot = slot
+        self.type_ = type_
+        self.array = False
+        self.offset = 0
+
+
+class Routine:
+    __slots__ = ('name', 'entry', 'params', 'template', 'body', 'result')
+
+    def __init__(self, name):
+        self.name = name
+        self.entry = 0
+        self.params = []
+        self.template = []
+        self.body = None
+        self.result = None
@@ -1,25 +1,35 @@
 from visitor import Visitor
 
+BUILTINS = ['write', 'writeln', 'read', 'readln', 'chr', 'ord', 'strlen', 'strcat', 'length', 'concat', 'inc', 'dec', 'insert']
+
+GLOBAL = 0
+LOCAL = 1
+
 
 class Symbol:
-    def __init__(self, id_, type_, scope):
+    __slots__ = ('id_', 'type_', 'scope', 'slot', 'value', 'symbols', 'offset', 'params', 'block')
+
+    def __init__(self, id_, type_, scope, slot=None):
         self.id_ = id_
         self.type_ = type_
         self.scope = scope
+        self.slot = slot
 
     def __str__(self):
         return "<{} {} {}>".format(self.id_, self.type_, self.scope)
 
     def copy(self):
-        return Symbol(self.id_, self.type_, self.scope)
+        return Symbol(self.id_, self.type_, self.scope, self.slot)
 
 
 class Symbols:
+    __slots__ = ('symbols',)
+
     def __init__(self):
         self.symbols = {}
 
-    def put(self, id_, type_, scope):
-        self.symbols[id_] = Symbol(id_, type_, scope)
+    def put(self, id_, type_, scope, slot=None):
+        self.symbols[id_] = Symbol(id_, type_, scope, slot)
 
     def get(self, id_):
         return self.symbols[id_]
@@ -48,66 +58,160 @@ class Symbols:
         return next(self.symbols.values())
 
 
+class Globals(Symbols):
+    __slots__ = ('slots',)
+
+    def __init__(self):
+        super().__init__()
+        self.slots = {}
+
+    def put(self, id_, type_, scope, slot=None):
+        super().put(id_, type_, scope, self.slot(id_))
+
+    def slot(self, id_):
+        if id_ not in self.slots:
+            self.slots[id_] = len(self.slots)
+        return self.slots[id_]
+
+    def size(self):
+        return len(self.slots)
+
+
 class Symbolizer(Visitor):
     def __init__(self, ast):
         self.ast = ast
+        self.scopes = []
+        self.chain = ()
+        self.pending = None
+        self.layout = []
+        self.refs = []
+
+    def enter(self, symbols):
+        self.scopes.append(symbols)
+        self.chain = tuple(self.scopes)
+
+    def leave(self):
+        self.scopes.pop()
+        self.chain = tuple(self.scopes)
+
+    def declare(self, parent, id_, type_):
+        if isinstance(parent.symbols, Globals) or self.pending is None:
+            parent.symbols.put(id_, type_, id(parent))
+        else:
+            slot = parent.symbols.get(id_).slot if parent.symbols.contains(id_) else len(self.layout)
+            parent.symbols.put(id_, type_, id(parent), slot)
+            if slot == len(self.layout):
+                self.layout.append(None)
+            self.layout[slot] = parent.symbols.get(id_)
+
+    def reference(self, node):
+        if self.pending is None:
+            self.resolve(node, ())
+        else:
+            self.pending.append((node, self.chain))
+
+    def resolve(self, node, chain):
+        for symbols in reversed(chain):
+            if symbols.contains(node.value):
+                node.depth = LOCAL
+                node.slot = symbols.get(node.value).slot
+                return
+        node.depth = GLOBAL
+        node.slot = self.ast.symbols.slot(node.value)
+        self.refs.append(node)
+
+    def routine(self, block, visit):
+        state = self.scopes, self.chain, self.pending, self.layout
+        self.scopes, self.chain, self.pending, self.layout = [], (), [], []
+        visit()
+        for node, chain in self.pending:
+            self.resolve(node, chain)
+        block.layout = self.layout
+        self.scopes, self.chain, self.pending, self.layout = state
 
     def visit_Program(self, parent, node):
-        node.symbols = Symbols()
+        node.symbols = Globals()
         for n in node.nodes:
             self.visit(node, n)
 
     def visit_Decl(self, parent, node):
-        parent.symbols.put(node.id_.value, node.type_.value, id(parent))
+        self.declare(parent, node.id_.value, node.type_.value)
+        self.reference(node.id_)
 
     def visit_ArrayDecl(self, parent, node):
         node.symbols = Symbols()
-        parent.symbols.put(node.id_.value, node.type_.value, id(parent))
+        self.declare(parent, node.id_.value, node.type_.value)
+        self.reference(node.id_)
+        if node.size is not None:
+            self.visit(node, node.size)
+        if node.elems is not None:
+            self.visit(node, node.elems)
 
     def visit_ArrayElem(self, parent, node):
-        pass
+        self.reference(node.id_)
+        self.visit(node, node.index)
 
     def visit_Assign(self, parent, node):
-        pass
+        self.visit(node, node.id_)
+        self.visit(node, node.expr)
 
     def visit_If(self, parent, node):
+        self.visit(node, node.cond)
         self.visit(node, node.true)
         if node.false is not None:
             self.visit(node, node.false)
 
     def visit_While(self, parent, node):
+        self.visit(node, node.cond)
         self.visit(node, node.block)
 
     def visit_For(self, parent, node):
+        self.visit(node, node.init)
+        self.visit(node, node.to)
         self.visit(node, node.block)
 
     def visit_RepeatUntil(self, parent, node):
         self.visit(node, node.block)
+        self.visit(node, node.cond)
 
     def visit_FuncImpl(self, parent, node):
-        parent.symbols.put(node.id_.value, node.type_.value, id(parent))
-        self.visit(node, node.block)
-        self.visit(node, node.params)
+        self.declare(parent, node.id_.value, node.type_.value)
+        self.reference(node.id_)
+        self.routine(node.block, lambda: self.visit_routine(node))
 
     def visit_ProcImpl(self, parent, node):
-        parent.symbols.put(node.id_.value, None, id(parent))
+        self.declare(parent, node.id_.value, None)
+        self.reference(node.id_)
+        self.routine(node.block, lambda: self.visit_routine(node))
+
+    def visit_routine(self, node):
         self.visit(node, node.block)
         self.visit(node, node.params)
 
     def visit_FuncCall(self, parent, node):
-        pass
+        if node.id_.value not in BUILTINS:
+            self.reference(node.id_)
+        if node.args is not None:
+            self.visit(node, node.args)
 
     def visit_ProcCall(self, parent, node):
-        pass
+        self.visit_FuncCall(parent, node)
 
     def visit_Block(self, parent, node):
         if node.is_main:
             parent.symbols.put('main', '', id(parent))
+            self.routine(node, lambda: self.visit_block(parent, node))
+        else:
+            self.visit_block(parent, node)
+
+    def visit_block(self, parent, node):
         node.symbols = Symbols()
+        self.enter(node.symbols)
         if node.var_decls is not None:
             self.visit(node, node.var_decls)
         for n in node.nodes:
             self.visit(node, n)
+        self.leave()
 
     def visit_VarDecl(self, parent, node):
         for n in node.decls:
@@ -116,14 +220,19 @@ class Symbolizer(Visitor):
     def visit_Params(self, parent, node):
         node.symbols = Symbols()
         for p in node.params:
-            self.visit(node, p)
-            self.visit(parent.block, p)
+            self.declare(parent.block, p.id_.value, p.type_.value)
+            symbol = parent.block.symbols.get(p.id_.value)
+            node.symbols.put(symbol.id_, symbol.type_, id(node), symbol.slot)
+            p.id_.depth = LOCAL
+            p.id_.slot = symbol.slot
 
     def visit_Args(self, parent, node):
-        pass
+        for a in node.args:
+            self.visit(node, a)
 
     def visit_Elems(self, parent, node):
-        pass
+        for e in node.elems:
+            self.visit(node, e)
 
     def visit_Break(self, parent, node):
         pass
@@ -132,7 +241,8 @@ class Symbolizer(Visitor):
         pass
 
     def visit_Exit(self, parent, node):
-        pass
+        if node.expr is not None:
+            self.visit(node, node.expr)
 
     def visit_Type(self, parent, node):
         pass
@@ -153,12 +263,16 @@ class Symbolizer(Visitor):
         pass
 
     def visit_Id(self, parent, node):
-        pass
+        self.reference(node)
 
     def visit_BinOp(self, parent, node):
-        pass
+        self.visit(node, node.first)
+        self.visit(node, node.second)
 
     def visit_UnOp(self, parent, node):
+        self.visit(node, node.first)
+
+    def visit_NoneType(self, parent, node):
         pass
 
     def symbolize(self):
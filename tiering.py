@@ -0,0 +1,341 @@
+from parser import walk, Id, Int, Real, Char, String, Boolean, ArrayElem, BinOp, UnOp, Block, Break, Exit, Continue, \
+    While, For, RepeatUntil, FuncCall, FuncImpl, ProcImpl
+from symbolizer import BUILTINS, GLOBAL
+from visitor import Visitor
+
+THRESHOLD = 256
+
+LOOPS = (While, For, RepeatUntil)
+
+EXPRESSIONS = (Id, Int, Real, Char, String, Boolean, ArrayElem, BinOp, UnOp)
+
+CONSTANTS = (Int, Real, Char, String, Boolean)
+
+
+class Tiering:
+    def __init__(self, runner, threshold=THRESHOLD):
+        self.runner = runner
+        # None keeps every node on the AST walker but still counts it
+        self.threshold = threshold if threshold is not None else -1
+        self.counters = {}
+        self.compiled = {}
+        self.failed = set()
+        self.events = []
+        self.labels = {}
+        for n in runner.ast.nodes:
+            routine = n.id_.value if isinstance(n, (FuncImpl, ProcImpl)) else 'main'
+            if isinstance(n, (FuncImpl, ProcImpl)):
+                self.labels[n.block] = routine
+            seen = {}
+            for m in walk(n):
+                if isinstance(m, LOOPS):
+                    kind = type(m).__name__
+                    seen[kind] = seen.get(kind, 0) + 1
+                    self.labels[m] = '{}:{}#{}'.format(routine, kind, seen[kind])
+
+    def enter(self, node):
+        return self.counters.get(node, 0), self.threshold
+
+    def leave(self, node, heat):
+        self.counters[node] = heat
+
+    def call(self, block):
+        body = self.compiled.get(block)
+        if body is None:
+            heat = self.counters[block] = self.counters.get(block, 0) + 1
+            if heat == self.threshold:
+                body = self.promote(block, heat)
+        return body
+
+    def promote(self, node, heat):
+        self.counters[node] = heat
+        if node in self.failed:
+            return None
+        layout = node.layout if isinstance(node, Block) else self.runner.frames[1]
+        compiled = Specializer(self.runner, layout).compile(node)
+        if compiled is None:
+            self.failed.add(node)
+            return None
+        self.compiled[node] = compiled
+        self.events.append((self.labels.get(node, type(node).__name__), heat))
+        return compiled
+
+    def counts(self):
+        return {self.labels.get(node, type(node).__name__): heat for node, heat in self.counters.items()}
+
+    def stats(self):
+        return {
+            'threshold': self.threshold,
+            'compiled': len(self.compiled),
+            'failed': len(self.failed),
+            'events': list(self.events),
+        }
+
+
+class Specializer(Visitor):
+    def __init__(self, runner, layout):
+        self.runner = runner
+        self.frames = runner.frames
+        self.layout = layout
+
+    def compile(self, node):
+        if isinstance(node, Block) and node.is_main:
+            return None
+        return self.visit(None, node)
+
+    def die(self, parent, node):
+        runner = self.runner
+        return lambda: runner.visit(parent, node)
+
+    def expression(self, parent, node):
+        if isinstance(node, EXPRESSIONS):
+            return self.visit(parent, node)
+        value = self.runner.value
+        if isinstance(node, FuncCall):
+            call = self.visit(parent, node)
+            return lambda: value(call())
+        runner = self.runner
+        return lambda: value(runner.visit(parent, node))
+
+    def condition(self, parent, node):
+        # The Runner tests While and RepeatUntil conditions without unwrapping symbols
+        if isinstance(node, Id) and getattr(node, 'depth', None) is not None:
+            return self.symbol(node)
+        return self.expression(parent, node)
+
+    def symbol(self, node):
+        slot = node.slot
+        if node.depth == GLOBAL:
+            globals_ = self.frames[0]
+            return lambda: globals_[slot]
+        frames = self.frames
+        return lambda: frames[1][slot]
+
+    def type_(self, node):
+        frame = self.frames[0] if node.depth == GLOBAL else self.layout
+        return frame[node.slot].type_
+
+    def visit_Block(self, parent, node):
+        runner = self.runner
+        decls = self.visit(node, node.var_decls) if node.var_decls is not None else None
+        statements = []
+        ending = None
+        for n in node.nodes:
+            if isinstance(n, (Break, Exit)):
+                ending = n
+                break
+            elif not isinstance(n, Continue):
+                statements.append(self.visit(node, n))
+        statements = tuple(statements)
+        value = None
+        if isinstance(ending, Exit) and ending.expr is not None:
+            value = self.expression(ending, ending.expr)
+
+        def run():
+            if decls is not None:
+                decls()
+            result = None
+            for statement in statements:
+                if runner.return_:
+                    return result
+                result = statement()
+            if ending is None or runner.return_:
+                return result
+            if value is not None:
+                result = value()
+            runner.return_ = True
+            return result
+
+        return run
+
+    def visit_Assign(self, parent, node):
+        value = self.expression(node, node.expr)
+        target = node.id_
+        if isinstance(target, ArrayElem):
+            return self.store(target, value)
+        if getattr(target, 'depth', None) is None:
+            return self.die(parent, node)
+        symbol = self.symbol(target)
+
+        def run():
+            symbol().value = value()
+
+        return run
+
+    def store(self, node, value):
+        symbol = self.symbol(node.id_)
+        index = self.expression(node, node.index)
+
+        def run():
+            v = value()
+            id_ = symbol()
+            i = index()
+            if isinstance(v, str):
+                v = ord(v)
+            id_.symbols[i - id_.offset] = v
+
+        return run
+
+    def visit_If(self, parent, node):
+        cond = self.expression(node, node.cond)
+        true = self.visit(node, node.true)
+        if node.false is None:
+            def run():
+                if cond():
+                    return true()
+
+            return run
+        false = self.visit(node, node.false)
+
+        def run():
+            if cond():
+                return true()
+            return false()
+
+        return run
+
+    def visit_While(self, parent, node):
+        cond = self.condition(node, node.cond)
+        block = self.visit(node, node.block)
+
+        def run():
+            while cond():
+                block()
+
+        return run
+
+    def visit_RepeatUntil(self, parent, node):
+        runner = self.runner
+        cond = self.condition(node, node.cond)
+        block = self.visit(node, node.block)
+
+        def run():
+            while True:
+                block()
+                if cond() or runner.return_:
+                    runner.return_ = False
+                    break
+
+        return run
+
+    def visit_For(self, parent, node):
+        runner = self.runner
+        init = self.visit(node, node.init)
+        var = self.symbol(node.init.id_)
+        to = self.expression(node, node.to)
+        block = self.visit(node, node.block)
+        reversed_ = node.reversed
+
+        def iterate(var, to, cond):
+            result = None
+            while cond and not runner.return_ and not runner.input_picked:
+                result = block()
+                if result is not None:
+                    break
+                if reversed_:
+                    cond = var.value > to
+                    var.value -= 1
+                else:
+                    cond = var.value < to
+                    var.value += 1
+            runner.input_picked = False
+            return result
+
+        # resume continues a loop the Runner started with its (var, to, cond) state
+        def run(resume=None):
+            if resume is not None:
+                return iterate(*resume)
+            init()
+            symbol = var()
+            bound = to()
+            vectorizer = runner.vectorizer
+            if vectorizer is not None and vectorizer.run(node, symbol, bound):
+                runner.input_picked = False
+                return None
+            return iterate(symbol, bound, symbol.value >= bound if reversed_ else symbol.value <= bound)
+
+        return run
+
+    def visit_FuncCall(self, parent, node):
+        func = node.id_.value
+        if func in BUILTINS or getattr(node.id_, 'depth', None) is None:
+            return self.die(parent, node)
+        invoke = self.runner.invoke
+        impl = self.symbol(node.id_)
+        args = tuple(self.expression(node.args, a) for a in node.args.args)
+
+        def run():
+            symbol = impl()
+            return invoke(node, func, symbol, [a() for a in args])
+
+        return run
+
+    def visit_Int(self, parent, node):
+        value = node.value
+        return lambda: value
+
+    def visit_Real(self, parent, node):
+        return self.visit_Int(parent, node)
+
+    def visit_String(self, parent, node):
+        return self.visit_Int(parent, node)
+
+    def visit_Char(self, parent, node):
+        value = ord(node.value)
+        return lambda: value
+
+    def visit_Boolean(self, parent, node):
+        value = node.value == 'true'
+        return lambda: value
+
+    def visit_Id(self, parent, node):
+        if getattr(node, 'depth', None) is None:
+            runner = self.runner
+            return lambda: runner.value(runner.visit(parent, node))
+        slot = node.slot
+        if node.depth == GLOBAL:
+            globals_ = self.frames[0]
+            return lambda: globals_[slot].value
+        frames = self.frames
+        return lambda: frames[1][slot].value
+
+    def visit_ArrayElem(self, parent, node):
+        symbol = self.symbol(node.id_)
+        index = self.expression(node, node.index)
+        if self.type_(node.id_) == 'boolean':
+            def run():
+                id_ = symbol()
+                return id_.symbols[index() - id_.offset] != 0
+
+            return run
+
+        def run():
+            id_ = symbol()
+            return id_.symbols[index() - id_.offset]
+
+        return run
+
+    def visit_BinOp(self, parent, node):
+        first = self.expression(node, node.first)
+        apply = node.op.apply
+        short = node.op.short
+        if short is not None:
+            second = self.expression(node, node.second)
+
+            def run():
+                a = first()
+                if (a != 0) == short:
+                    return short
+                return apply(a, second())
+
+            return run
+        if isinstance(node.second, CONSTANTS):
+            b = self.visit(node, node.second)()
+            return lambda: apply(first(), b)
+        second = self.expression(node, node.second)
+        return lambda: apply(first(), second())
+
+    def visit_UnOp(self, parent, node):
+        first = self.expression(node, node.first)
+        apply = node.op.apply
+        return lambda: apply(first())
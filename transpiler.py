@@ -0,0 +1,393 @@
+from parser import walk, Id, Int, Char, String, Boolean, ArrayElem, ArrayDecl, Decl, FuncCall, ProcCall, FuncImpl, ProcImpl, VarDecl, Block
+from console import Console
+from runtime import BUILTINS, DEFAULTS, char, chars, concat, ordinal, text
+from symbolizer import GLOBAL
+from visitor import Visitor
+
+
+def initial(type_):
+    return repr(DEFAULTS[type_]) if type_ in DEFAULTS else 'None'
+
+
+class Transpiler(Visitor):
+    def __init__(self, ast):
+        self.ast = ast
+        self.lines = []
+        self.level = 0
+        self.globals = {}
+        self.locals = {}
+        self.routines = set()
+        self.function = None
+        self.depth = 0
+        self.loops = 0
+        self.steps = []
+
+    def line(self, text):
+        self.lines.append('    ' * self.level + text)
+
+    def name(self, node):
+        if node.depth == GLOBAL:
+            if node.value == self.function:
+                return 'result'
+            return 'g_' + node.value
+        return '{}_{}'.format(node.value, node.slot)
+
+    def decl(self, node):
+        if node.depth == GLOBAL:
+            return self.globals.get(node.value)
+        return self.locals.get(node.slot)
+
+    def type_of(self, node):
+        decl = self.decl(node)
+        if decl is None:
+            return None, False
+        return decl.type_.value, isinstance(decl, ArrayDecl)
+
+    def default(self, decl, type_):
+        if isinstance(decl, ArrayDecl):
+            return 'None'
+        elif type_ == 'string':
+            return '[]'
+        return initial(type_)
+
+    def visit_Program(self, parent, node):
+        for n in node.nodes:
+            if isinstance(n, (FuncImpl, ProcImpl)):
+                self.routines.add(n.id_.value)
+            elif isinstance(n, VarDecl):
+                for decl in n.decls:
+                    self.globals[decl.id_.value] = decl
+        for name, decl in self.globals.items():
+            self.line('g_{} = {}'.format(name, self.default(decl, decl.type_.value)))
+        for n in node.nodes:
+            self.visit(node, n)
+
+    def visit_VarDecl(self, parent, node):
+        for decl in node.decls:
+            self.visit(node, decl)
+
+    def routine(self, name, params, block, result_type, function=None):
+        self.locals = {}
+        for n in walk(block):
+            if isinstance(n, (Decl, ArrayDecl)):
+                self.locals[n.id_.slot] = n
+        for p in params:
+            self.locals[p.id_.slot] = p
+        self.function = function
+        self.line('def {}({}):'.format(name, ', '.join(self.name(p.id_) for p in params)))
+        self.level += 1
+        names = sorted(set(n.value for n in walk(block) if isinstance(n, Id) and getattr(n, 'depth', None) == GLOBAL and n.value in self.globals))
+        if names:
+            self.line('global ' + ', '.join('g_' + n for n in names))
+        if result_type is not None:
+            self.line('result = ' + initial(result_type))
+        slots = set(p.id_.slot for p in params)
+        for s in block.layout:
+            if s.slot not in slots:
+                self.line('{}_{} = {}'.format(s.id_, s.slot, self.default(self.locals.get(s.slot), s.type_)))
+        self.depth = 0
+        start = len(self.lines)
+        self.statements(block)
+        if result_type is not None:
+            self.line('return result')
+        elif len(self.lines) == start:
+            self.line('pass')
+        self.level -= 1
+        self.lines.append('')
+        self.function = None
+        self.locals = {}
+
+    def visit_FuncImpl(self, parent, node):
+        if not isinstance(parent, type(self.ast)):
+            self.error("Unsupported nested function: {}".format(node.id_.value))
+        self.routine('r_' + node.id_.value, node.params.params, node.block, node.type_.value, node.id_.value)
+
+    def visit_ProcImpl(self, parent, node):
+        self.routine('r_' + node.id_.value, node.params.params, node.block, None)
+
+    def visit_Block(self, parent, node):
+        if node.is_main:
+            self.routine('main', [], node, None)
+            self.line('main()')
+            return
+        self.depth += 1
+        self.statements(node)
+        self.depth -= 1
+
+    def statements(self, block):
+        if block.var_decls is not None:
+            for decl in block.var_decls.decls:
+                self.visit(block, decl)
+        for n in block.nodes:
+            self.statement(block, n)
+
+    def suite(self, parent, block):
+        self.level += 1
+        start = len(self.lines)
+        self.visit(parent, block)
+        if len(self.lines) == start:
+            self.line('pass')
+        self.level -= 1
+
+    def statement(self, parent, node):
+        if isinstance(node, Id):
+            if node.value not in self.routines and node.value not in BUILTINS:
+                return
+            node = FuncCall(node, None)
+        if isinstance(node, (FuncCall, ProcCall)):
+            self.line(self.call(node))
+            return
+        self.visit(parent, node)
+
+    def visit_Decl(self, parent, node):
+        name = self.name(node.id_)
+        if node.type_.value == 'string':
+            self.line(name + ' = []')
+        elif self.depth > 0:
+            self.line('{} = {}'.format(name, initial(node.type_.value)))
+
+    def visit_ArrayDecl(self, parent, node):
+        name = self.name(node.id_)
+        default = initial(node.type_.value)
+        if node.from_ is not None:
+            length = str(node.to_.value - node.from_.value + 1)
+        elif node.size is not None:
+            length = self.expr(node.size)
+        else:
+            length = '100'
+        if node.elems is not None:
+            elems = ', '.join(self.expr(e) for e in node.elems.elems)
+            self.line('{} = [{}]'.format(name, elems))
+            self.line('{}.extend([{}] * ({} - len({})))'.format(name, default, length, name))
+        else:
+            self.line('{} = [{}] * {}'.format(name, default, length))
+
+    def offset(self, node):
+        decl = self.decl(node.id_)
+        if isinstance(decl, ArrayDecl) and decl.from_ is not None:
+            return decl.from_.value
+        return 0
+
+    def index(self, node):
+        offset = self.offset(node)
+        if isinstance(node.index, Int):
+            return str(node.index.value - offset)
+        if offset == 0:
+            return self.expr(node.index)
+        return '{} - {}'.format(self.expr(node.index), offset)
+
+    def target(self, node):
+        if isinstance(node, ArrayElem):
+            return '{}[{}]'.format(self.name(node.id_), self.index(node))
+        return self.name(node)
+
+    def visit_Assign(self, parent, node):
+        self.line('{} = {}'.format(self.target(node.id_), self.expr(node.expr)))
+
+    def visit_If(self, parent, node):
+        self.line('if {}:'.format(self.expr(node.cond)))
+        self.suite(node, node.true)
+        if node.false is not None:
+            self.line('else:')
+            self.suite(node, node.false)
+
+    def visit_While(self, parent, node):
+        self.line('while {}:'.format(self.expr(node.cond)))
+        self.steps.append(None)
+        self.suite(node, node.block)
+        self.steps.pop()
+
+    def visit_RepeatUntil(self, parent, node):
+        self.loops += 1
+        first = '_first{}'.format(self.loops)
+        self.line(first + ' = True')
+        self.line('while {} or not {}:'.format(first, self.expr(node.cond)))
+        self.level += 1
+        self.line(first + ' = False')
+        self.level -= 1
+        self.steps.append(None)
+        self.suite(node, node.block)
+        self.steps.pop()
+
+    def visit_For(self, parent, node):
+        if not isinstance(node.init.id_, Id):
+            self.error("Unsupported loop variable")
+        self.loops += 1
+        name = self.name(node.init.id_)
+        bound = '_to{}'.format(self.loops)
+        # The variable itself drives the loop, so body writes count and it ends one past the bound
+        step = '{} {}= 1'.format(name, '-' if node.reversed else '+')
+        self.line('{} = {}'.format(name, self.expr(node.init.expr)))
+        self.line('{} = {}'.format(bound, self.expr(node.to)))
+        self.line('while {} {} {}:'.format(name, '>=' if node.reversed else '<=', bound))
+        self.steps.append(step)
+        self.suite(node, node.block)
+        self.steps.pop()
+        self.level += 1
+        self.line(step)
+        self.level -= 1
+
+    def visit_Break(self, parent, node):
+        self.line('break')
+
+    def visit_Continue(self, parent, node):
+        if self.steps and self.steps[-1] is not None:
+            self.line(self.steps[-1])
+        self.line('continue')
+
+    def visit_Exit(self, parent, node):
+        if node.expr is None:
+            self.line('return result' if self.function else 'return')
+        elif self.function:
+            self.line('return ' + self.expr(node.expr))
+        else:
+            self.line(self.expr(node.expr))
+            self.line('return')
+
+    def call(self, node):
+        func = node.id_.value
+        args = node.args.args if node.args is not None else []
+        if func == 'write' or func == 'writeln':
+            parts = [self.format(a) for a in args]
+            if func == 'writeln':
+                parts.append("'\\n'")
+            return '_write({})'.format(' + '.join(parts) if parts else "''")
+        elif func == 'read' or func == 'readln':
+            reads = [self.read(a) for a in args]
+            if func == 'readln':
+                reads.append('_skip()')
+            return '; '.join(reads) if reads else 'pass'
+        elif func == 'chr':
+            if isinstance(args[0], Int):
+                return repr(chr(args[0].value))
+            return 'chr({})'.format(self.expr(args[0]))
+        elif func == 'ord':
+            if isinstance(args[0], Char):
+                return str(ord(args[0].value))
+            return '_ord({})'.format(self.expr(args[0]))
+        elif func == 'strlen':
+            if isinstance(args[0], String):
+                return str(len(args[0].value))
+            return 'len(_text({}))'.format(self.name(args[0]))
+        elif func == 'strcat':
+            if isinstance(args[1], String):
+                codes = repr([ord(c) for c in args[1].value])
+            else:
+                codes = '[c for c in {} if c]'.format(self.name(args[1]))
+            return '_concat({}, {})'.format(self.name(args[0]), codes)
+        elif func in self.routines:
+            return 'r_{}({})'.format(func, ', '.join(self.expr(a) for a in args))
+        self.error("Unknown routine: {}".format(func))
+
+    def format(self, node):
+        roundings = getattr(node, 'roundings', None)
+        if roundings is not None:
+            pattern = '{:' + str(roundings[0].value) + '.' + str(roundings[1].value) + 'f}'
+            return '{!r}.format({})'.format(pattern, self.expr(node))
+        if isinstance(node, Int):
+            return repr(str(node.value))
+        elif isinstance(node, (Boolean, Char, String)):
+            return repr(str(node.value))
+        elif isinstance(node, Id) and node.value not in self.routines:
+            type_, array = self.type_of(node)
+            if (array or type_ == 'string') and type_ in ['char', 'string']:
+                return '_text({})'.format(self.name(node))
+            elif type_ == 'char' and not array:
+                return '_char({})'.format(self.name(node))
+        elif isinstance(node, ArrayElem) and self.type_of(node.id_)[0] == 'char':
+            return '_char({})'.format(self.expr(node))
+        return 'str({})'.format(self.expr(node))
+
+    def read(self, node):
+        if isinstance(node, ArrayElem):
+            type_, _ = self.type_of(node.id_)
+        else:
+            type_, array = self.type_of(node)
+            if array:
+                return '_chars({}, _token())'.format(self.name(node))
+            elif type_ == 'string':
+                return '{}.extend([ord(c) for c in _token()])'.format(self.name(node))
+        if type_ == 'integer':
+            value = 'int(_token())'
+        elif type_ == 'real':
+            value = 'float(_token())'
+        elif type_ == 'char':
+            value = 'ord(_token()[0])'
+        elif type_ == 'boolean':
+            value = "(_token().lower() == 'true')"
+        else:
+            value = '_token()'
+        return '{} = {}'.format(self.target(node), value)
+
+    def expr(self, node):
+        return self.visit(None, node)
+
+    def visit_FuncCall(self, parent, node):
+        return self.call(node)
+
+    def visit_ProcCall(self, parent, node):
+        return self.call(node)
+
+    def visit_Int(self, parent, node):
+        return str(node.value)
+
+    def visit_Real(self, parent, node):
+        return repr(float(node.value))
+
+    def visit_Boolean(self, parent, node):
+        return 'True' if node.value == 'true' else 'False'
+
+    def visit_Char(self, parent, node):
+        return str(ord(node.value))
+
+    def visit_String(self, parent, node):
+        return repr(node.value)
+
+    def visit_Id(self, parent, node):
+        if node.value in self.routines and node.depth == GLOBAL and node.value != self.function:
+            return 'r_{}()'.format(node.value)
+        return self.name(node)
+
+    def visit_ArrayElem(self, parent, node):
+        return self.target(node)
+
+    def visit_BinOp(self, parent, node):
+        first = self.expr(node.first)
+        second = self.expr(node.second)
+        if node.op.template is None:
+            self.error("Unsupported operator: {}".format(node.symbol))
+        return node.op.template.format(first, second)
+
+    def visit_UnOp(self, parent, node):
+        if node.op.template is None:
+            self.error("Unsupported operator: {}".format(node.symbol))
+        return node.op.template.format(self.expr(node.first))
+
+    def transpile(self):
+        self.visit(None, self.ast)
+        return '\n'.join(self.lines) + '\n'
+
+    def compile(self):
+        return compile(self.transpile(), '<pascal>', 'exec')
+
+    def error(self, text):
+        raise SystemExit(text)
+
+
+def execute(code, console=None):
+    console = console or Console()
+    namespace = {
+        '__name__': '__pascal__',
+        '_write': console.write,
+        '_token': console.token,
+        '_skip': console.skip_line,
+        '_char': char,
+        '_text': text,
+        '_ord': ordinal,
+        '_concat': concat,
+        '_chars': chars,
+    }
+    try:
+        exec(code, namespace)
+    finally:
+        console.flush()
@@ -0,0 +1,293 @@
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from parser import walk, Id, Int, Real, ArrayElem, Assign, BinOp, UnOp, If, Block
+
+AVAILABLE = numpy is not None
+
+MAP = 0
+SUM = 1
+COUNT = 2
+EXTREMUM = 3
+
+NUMERIC = ['integer', 'real']
+
+DTYPES = {'integer': 'int64', 'real': 'float64'}
+
+ARITHMETIC = ['+', '-', '*', '/', 'div', 'mod']
+
+COMPARISONS = {'=': 'equal', '<>': 'not_equal', '<': 'less', '>': 'greater', '<=': 'less_equal', '>=': 'greater_equal'}
+
+MIRRORED = {'<': '>', '>': '<', '<=': '>=', '>=': '<='}
+
+ORDERS = {'<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge}
+
+# Integer intermediates stay below this bound so int64 never wraps
+SAFE = 1 << 62
+
+# Integers below this bound convert to float64 exactly, as Python does
+EXACT = 1 << 53
+
+# Shorter loops are cheaper on the scalar path
+MINIMUM = 32
+
+
+class Fallback(Exception):
+    pass
+
+
+def references(node, id_):
+    return any(isinstance(n, Id) and n.value == id_ for n in walk(node))
+
+
+def shape(node):
+    if isinstance(node, BinOp):
+        return node.symbol, shape(node.first), shape(node.second)
+    elif isinstance(node, UnOp):
+        return node.symbol, shape(node.first)
+    elif isinstance(node, ArrayElem):
+        return 'elem', node.id_.value, shape(node.index)
+    return type(node).__name__, node.value
+
+
+class Vectorizer:
+    def __init__(self, runner, minimum=MINIMUM):
+        self.runner = runner
+        self.minimum = minimum
+        self.plans = {}
+        self.index = None
+        self.vectorized = 0
+        self.fallbacks = 0
+
+    def run(self, node, var, to):
+        if id(node) not in self.plans:
+            self.plans[id(node)] = self.plan(node)
+        plan = self.plans[id(node)]
+        lo = var.value
+        if plan is None or type(lo) is not int or type(to) is not int or to - lo + 1 < self.minimum:
+            return False
+        self.index = node.init.id_.value
+        try:
+            self.execute(plan, lo, to)
+        except Fallback:
+            self.fallbacks += 1
+            return False
+        var.value = to + 1
+        self.vectorized += 1
+        return True
+
+    def plan(self, node):
+        block = node.block
+        if node.reversed or not isinstance(block, Block) or block.var_decls is not None or not block.nodes:
+            return None
+        self.index = node.init.id_.value
+        statements = block.nodes
+        if all(isinstance(s, Assign) and isinstance(s.id_, ArrayElem) for s in statements):
+            for s in statements:
+                target = self.array(s.id_)
+                kind = self.kind(s.expr)
+                if target is None or kind not in NUMERIC or (target == 'integer' and kind != 'integer'):
+                    return None
+            return MAP, statements
+        if len(statements) != 1:
+            return None
+        statement = statements[0]
+        if isinstance(statement, Assign) and isinstance(statement.id_, Id):
+            return self.reduction(statement)
+        if isinstance(statement, If) and statement.false is None and len(statement.true.nodes) == 1:
+            assign = statement.true.nodes[0]
+            if isinstance(assign, Assign) and isinstance(assign.id_, Id):
+                return self.conditional(statement.cond, assign)
+        return None
+
+    def reduction(self, assign):
+        id_ = assign.id_.value
+        expr = assign.expr
+        if id_ == self.index or not isinstance(expr, BinOp) or expr.symbol != '+' or self.scalar(assign.id_) is None:
+            return None
+        for mine, other in [(expr.first, expr.second), (expr.second, expr.first)]:
+            if isinstance(mine, Id) and mine.value == id_ and not references(other, id_):
+                if self.kind(other) in NUMERIC:
+                    return SUM, assign.id_, other
+        return None
+
+    def conditional(self, cond, assign):
+        id_ = assign.id_.value
+        target = self.scalar(assign.id_)
+        if id_ == self.index or target is None or not isinstance(cond, BinOp):
+            return None
+        expr = assign.expr
+        if target == 'integer' and isinstance(expr, BinOp) and expr.symbol == '+' and not references(cond, id_):
+            one = [e for e in (expr.first, expr.second) if isinstance(e, Int) and e.value == 1]
+            mine = [e for e in (expr.first, expr.second) if isinstance(e, Id) and e.value == id_]
+            if one and mine and self.kind(cond) == 'boolean':
+                return COUNT, assign.id_, cond
+        if cond.symbol not in MIRRORED:
+            return None
+        symbol, first, second = cond.symbol, cond.first, cond.second
+        if isinstance(first, Id) and first.value == id_:
+            symbol, first, second = MIRRORED[symbol], second, first
+        if not (isinstance(second, Id) and second.value == id_) or references(first, id_):
+            return None
+        if shape(first) != shape(expr) or self.kind(first) not in NUMERIC:
+            return None
+        return EXTREMUM, assign.id_, first, symbol
+
+    def symbol(self, node):
+        try:
+            return self.runner.get_symbol(node)
+        except (AttributeError, IndexError):
+            return None
+
+    def scalar(self, node):
+        symbol = self.symbol(node)
+        if symbol is None or symbol.type_ not in NUMERIC or getattr(symbol, 'symbols', None) is not None:
+            return None
+        return symbol.type_
+
+    def array(self, node):
+        if not isinstance(node.index, Id) or node.index.value != self.index:
+            return None
+        symbol = self.symbol(node.id_)
+        if symbol is None or symbol.type_ not in NUMERIC or getattr(symbol, 'symbols', None) is None:
+            return None
+        return symbol.type_
+
+    def kind(self, node):
+        if isinstance(node, Int):
+            return 'integer' if type(node.value) is int else None
+        elif isinstance(node, Real):
+            return 'real'
+        elif isinstance(node, Id):
+            if node.value == self.index:
+                return 'integer'
+            return self.scalar(node)
+        elif isinstance(node, ArrayElem):
+            return self.array(node)
+        elif isinstance(node, UnOp):
+            kind = self.kind(node.first)
+            return kind if node.symbol == '-' and kind in NUMERIC else None
+        elif isinstance(node, BinOp) and getattr(node, 'roundings', None) is None:
+            first, second = self.kind(node.first), self.kind(node.second)
+            if node.symbol in ['and', 'or']:
+                return 'boolean' if first == second == 'boolean' else None
+            if first not in NUMERIC or second not in NUMERIC:
+                return None
+            if node.symbol in COMPARISONS:
+                return 'boolean'
+            elif node.symbol in ['div', 'mod']:
+                return 'integer' if first == second == 'integer' else None
+            elif node.symbol == '/' or 'real' in [first, second]:
+                return 'real'
+            elif node.symbol in ARITHMETIC:
+                return 'integer'
+        return None
+
+    def execute(self, plan, lo, hi):
+        kind = plan[0]
+        n = hi - lo + 1
+        if kind == MAP:
+            staged = {}
+            for s in plan[1]:
+                values, _ = self.evaluate(s.expr, lo, hi, staged)
+                view = self.view(s.id_.id_, lo, hi)
+                if view.dtype.kind == 'i' and numpy.asarray(values).dtype.kind != 'i':
+                    raise Fallback()
+                staged[s.id_.id_.value] = numpy.broadcast_to(values, (n,)).astype(view.dtype)
+            for s in plan[1]:
+                self.view(s.id_.id_, lo, hi)[:] = staged[s.id_.id_.value]
+            return
+
+        target = self.runner.get_symbol(plan[1])
+        current = target.value
+        if type(current) not in (int, float):
+            raise Fallback()
+        values, bound = self.evaluate(plan[2], lo, hi, {})
+        values = numpy.broadcast_to(values, (n,))
+        if kind == SUM:
+            if type(current) is int and bound is not None:
+                if bound * n >= SAFE:
+                    raise Fallback()
+                target.value = current + int(values.sum())
+            else:
+                if bound is not None and bound >= EXACT:
+                    raise Fallback()
+                totals = numpy.add.accumulate(numpy.concatenate(([current], values.astype('float64'))))
+                target.value = float(totals[-1])
+        elif kind == COUNT:
+            if type(current) is not int:
+                raise Fallback()
+            target.value = current + int(numpy.count_nonzero(values))
+        elif kind == EXTREMUM:
+            best = values.max() if plan[3] in ['>', '>='] else values.min()
+            best = int(best) if bound is not None else float(best)
+            if ORDERS[plan[3]](best, current):
+                target.value = best
+
+    def view(self, node, lo, hi):
+        symbol = self.runner.get_symbol(node)
+        start, stop = lo - symbol.offset, hi - symbol.offset + 1
+        storage = symbol.symbols
+        if start < 0 or stop > len(storage):
+            raise Fallback()
+        return numpy.frombuffer(storage, DTYPES[symbol.type_])[start:stop]
+
+    def evaluate(self, node, lo, hi, staged):
+        # Returns the values and an integer magnitude bound, or None for reals
+        if isinstance(node, Int):
+            return node.value, self.bound(abs(node.value))
+        elif isinstance(node, Real):
+            return node.value, None
+        elif isinstance(node, Id):
+            if node.value == self.index:
+                return numpy.arange(lo, hi + 1, dtype='int64'), self.bound(max(abs(lo), abs(hi)))
+            value = self.runner.value(self.runner.get_symbol(node))
+            if type(value) is int:
+                return value, self.bound(abs(value))
+            elif type(value) is float:
+                return value, None
+            raise Fallback()
+        elif isinstance(node, ArrayElem):
+            values = staged.get(node.id_.value)
+            if values is None:
+                values = self.view(node.id_, lo, hi)
+            if values.dtype.kind == 'f':
+                return values, None
+            return values, max(abs(int(values.max())), abs(int(values.min())))
+        elif isinstance(node, UnOp):
+            values, bound = self.evaluate(node.first, lo, hi, staged)
+            return -values, bound
+
+        first, a = self.evaluate(node.first, lo, hi, staged)
+        second, b = self.evaluate(node.second, lo, hi, staged)
+        symbol = node.symbol
+        integral = a is not None and b is not None
+        if (not integral or symbol == '/') and max(a or 0, b or 0) >= EXACT:
+            raise Fallback()
+        if symbol in COMPARISONS:
+            return getattr(numpy, COMPARISONS[symbol])(first, second), 1
+        elif symbol in ['and', 'or']:
+            combine = numpy.logical_and if symbol == 'and' else numpy.logical_or
+            return combine(numpy.not_equal(first, 0), numpy.not_equal(second, 0)), 1
+        elif symbol in ['/', 'div', 'mod'] and not numpy.all(second):
+            raise Fallback()
+        if symbol == '+' or symbol == '-':
+            values, bound = numpy.add(first, second) if symbol == '+' else numpy.subtract(first, second), a + b if integral else None
+        elif symbol == '*':
+            values, bound = numpy.multiply(first, second), a * b if integral else None
+        elif symbol == '/':
+            values, bound = numpy.true_divide(first, second), None
+        elif symbol == 'div':
+            values, bound = numpy.floor_divide(first, second), a
+        else:
+            values, bound = numpy.remainder(first, second), b
+        return values, None if bound is None else self.bound(bound)
+
+    def bound(self, bound):
+        if bound >= SAFE:
+            raise Fallback()
+        return bound
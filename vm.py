@@ -0,0 +1,718 @@
+import sys
+from array import array
+
+from parser import Id, Int, Real, Char, String, Boolean, ArrayElem, FuncCall, ProcCall, FuncImpl, ProcImpl
+from console import Console
+from runtime import BUILTINS, DEFAULTS, Routine, Var, char, concat, ordinal, text
+from visitor import Visitor
+
+OPCODES = [
+    'LOAD', 'STORE', 'INT', 'REAL', 'CONST', 'POP',
+    'LOAD_ELEM', 'STORE_ELEM',
+    'ADD', 'SUB', 'MUL', 'DIV', 'IDIV', 'MOD',
+    'EQ', 'NE', 'LT', 'GT', 'LE', 'GE', 'AND', 'OR', 'XOR', 'NEG', 'NOT',
+    'JUMP', 'JUMP_FALSE', 'JUMP_GT', 'JUMP_LT', 'INCR', 'DECR',
+    'CALL', 'RETURN',
+    'WRITE', 'FORMAT', 'READ', 'READ_TEXT', 'READ_CHARS', 'SKIP_LINE',
+    'CHR', 'ORD', 'STRLEN', 'STRCAT',
+    'NEW', 'BUILD', 'PAD',
+]
+
+(LOAD, STORE, INT, REAL, CONST, POP,
+ LOAD_ELEM, STORE_ELEM,
+ ADD, SUB, MUL, DIV, IDIV, MOD,
+ EQ, NE, LT, GT, LE, GE, AND, OR, XOR, NEG, NOT,
+ JUMP, JUMP_FALSE, JUMP_GT, JUMP_LT, INCR, DECR,
+ CALL, RETURN,
+ WRITE, FORMAT, READ, READ_TEXT, READ_CHARS, SKIP_LINE,
+ CHR, ORD, STRLEN, STRCAT,
+ NEW, BUILD, PAD) = range(len(OPCODES))
+
+BINARY = {
+    '+': ADD, '-': SUB, '*': MUL, '/': DIV, 'div': IDIV, 'mod': MOD,
+    '=': EQ, '<>': NE, '<': LT, '>': GT, '<=': LE, '>=': GE,
+    'and': AND, 'or': OR, 'xor': XOR,
+}
+
+NO_ARG = {
+    POP, ADD, SUB, MUL, DIV, IDIV, MOD, EQ, NE, LT, GT, LE, GE, AND, OR, XOR, NEG, NOT,
+    RETURN, SKIP_LINE, CHR, ORD, NEW, PAD,
+}
+
+# WRITE operand: how the value on top of the stack is printed
+AS_STR = 0
+AS_CHAR = 1
+AS_TEXT = 2
+
+# READ operand: how an input token is converted
+READERS = {'integer': 0, 'real': 1, 'char': 2, 'boolean': 3}
+
+# Bytes of call frames the VM may hold before reporting a stack overflow
+BUDGET = 1 << 28
+
+
+class Bytecode:
+    def __init__(self):
+        self.code = array('l')
+        self.reals = array('d')
+        self.constants = []
+        self.indices = {}
+        self.routines = []
+        self.main = None
+
+    def constant(self, value):
+        # Keyed by type as well, since 1, 1.0 and True are equal dictionary keys
+        key = (type(value), value)
+        index = self.indices.get(key)
+        if index is None:
+            index = self.indices[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def real(self, value):
+        self.reals.append(value)
+        return len(self.reals) - 1
+
+
+class Compiler(Visitor):
+    def __init__(self, ast):
+        self.ast = ast
+        self.bytecode = Bytecode()
+        self.code = self.bytecode.code
+        self.routines = {}
+        self.scopes = []
+        self.template = []
+        self.result = None
+        self.functions = set()
+        self.depth = 0
+        self.loops = []
+
+    def compile(self):
+        self.visit(None, self.ast)
+        return self.bytecode
+
+    def emit(self, op, arg=0):
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def here(self):
+        return len(self.code)
+
+    def patch(self, address, target):
+        self.code[address + 1] = target
+
+    def allocate(self, type_):
+        var = Var(len(self.template), type_)
+        self.template.append(DEFAULTS.get(type_))
+        return var
+
+    def lookup(self, id_):
+        for scope in reversed(self.scopes):
+            if id_ in scope:
+                return scope[id_]
+        self.error("Undeclared identifier: {}".format(id_))
+
+    def declare(self, block):
+        scope = {}
+        for s in block.symbols:
+            if s.id_ not in scope:
+                scope[s.id_] = self.allocate(s.type_)
+        self.scopes.append(scope)
+        return scope
+
+    def statements(self, block):
+        if block.var_decls is not None:
+            for decl in block.var_decls.decls:
+                self.visit(block, decl)
+        for n in block.nodes:
+            self.statement(block, n)
+
+    def statement(self, parent, node):
+        if isinstance(node, Id):
+            if node.value not in self.routines and node.value not in BUILTINS:
+                return
+            node = FuncCall(node, None)
+        if isinstance(node, (FuncCall, ProcCall)):
+            if self.call(node):
+                self.emit(POP)
+            return
+        self.visit(parent, node)
+
+    def visit_Program(self, parent, node):
+        for n in node.nodes:
+            if isinstance(n, FuncImpl):
+                self.functions.add(n.id_.value)
+            if isinstance(n, (FuncImpl, ProcImpl)):
+                routine = Routine(n.id_.value)
+                self.routines[routine.name] = len(self.bytecode.routines)
+                self.bytecode.routines.append(routine)
+        main = Routine('main')
+        self.bytecode.main = main
+        entry = self.emit(JUMP)
+        for n in node.nodes:
+            if isinstance(n, (FuncImpl, ProcImpl)):
+                self.visit(node, n)
+        self.patch(entry, self.here())
+        self.template = []
+        self.result = None
+        self.scopes = []
+        for n in node.nodes:
+            if not isinstance(n, (FuncImpl, ProcImpl)):
+                self.visit(node, n)
+        self.emit(RETURN)
+        main.template = self.template
+
+    def routine(self, node, result_type):
+        routine = self.bytecode.routines[self.routines[node.id_.value]]
+        routine.entry = self.here()
+        self.template = []
+        self.result = None
+        self.scopes = [{}]
+        if result_type is not None:
+            self.result = self.allocate(result_type)
+            self.scopes[0][node.id_.value] = self.result
+            routine.result = self.result.slot
+        scope = self.declare(node.block)
+        routine.params = tuple(scope[p.id_.value].slot for p in node.params.params)
+        self.statements(node.block)
+        self.emit(RETURN)
+        routine.template = self.template
+        self.scopes = []
+
+    def visit_FuncImpl(self, parent, node):
+        if not isinstance(parent, type(self.ast)):
+            self.error("Unsupported nested function: {}".format(node.id_.value))
+        self.routine(node, node.type_.value)
+
+    def visit_ProcImpl(self, parent, node):
+        self.routine(node, None)
+
+    def visit_Block(self, parent, node):
+        self.declare(node)
+        if node.is_main:
+            self.statements(node)
+            return
+        self.depth += 1
+        self.statements(node)
+        self.depth -= 1
+        self.scopes.pop()
+
+    def visit_Decl(self, parent, node):
+        var = self.lookup(node.id_.value)
+        if var.type_ == 'string':
+            self.emit(INT, 0)
+            self.emit(CONST, self.bytecode.constant(0))
+            self.emit(NEW)
+        elif self.depth > 0:
+            self.load_const(DEFAULTS.get(var.type_))
+        else:
+            return
+        self.emit(STORE, var.slot)
+
+    def visit_ArrayDecl(self, parent, node):
+        var = self.lookup(node.id_.value)
+        var.array = True
+        default = self.bytecode.constant(DEFAULTS.get(var.type_))
+        if node.from_ is not None:
+            var.offset = node.from_.value
+            length = node.to_.value - node.from_.value + 1
+        else:
+            length = 100
+        if node.elems is not None:
+            for e in node.elems.elems:
+                self.expr(node, e)
+            self.emit(BUILD, len(node.elems.elems))
+            self.emit(INT, length)
+            self.emit(CONST, default)
+            self.emit(PAD)
+        else:
+            if node.size is not None:
+                self.expr(node, node.size)
+            else:
+                self.emit(INT, length)
+            self.emit(CONST, default)
+            self.emit(NEW)
+        self.emit(STORE, var.slot)
+
+    def visit_Assign(self, parent, node):
+        target = node.id_
+        if isinstance(target, ArrayElem):
+            var = self.lookup(target.id_.value)
+            self.index(target, var)
+            self.expr(node, node.expr)
+            self.emit(STORE_ELEM, var.slot)
+            return
+        self.expr(node, node.expr)
+        self.emit(STORE, self.lookup(target.value).slot)
+
+    def index(self, node, var):
+        self.expr(node, node.index)
+        if var.offset:
+            self.emit(INT, var.offset)
+            self.emit(SUB)
+
+    def visit_If(self, parent, node):
+        self.expr(node, node.cond)
+        false = self.emit(JUMP_FALSE)
+        self.visit(node, node.true)
+        if node.false is None:
+            self.patch(false, self.here())
+            return
+        end = self.emit(JUMP)
+        self.patch(false, self.here())
+        self.visit(node, node.false)
+        self.patch(end, self.here())
+
+    def loop(self, parent, block):
+        self.loops.append(([], []))
+        self.visit(parent, block)
+        return self.loops.pop()
+
+    def visit_While(self, parent, node):
+        start = self.here()
+        self.expr(node, node.cond)
+        exit_ = self.emit(JUMP_FALSE)
+        breaks, continues = self.loop(node, node.block)
+        self.emit(JUMP, start)
+        end = self.here()
+        self.patch(exit_, end)
+        for b in breaks:
+            self.patch(b, end)
+        for c in continues:
+            self.patch(c, start)
+
+    def visit_RepeatUntil(self, parent, node):
+        start = self.here()
+        breaks, continues = self.loop(node, node.block)
+        cond = self.here()
+        self.expr(node, node.cond)
+        self.emit(JUMP_FALSE, start)
+        end = self.here()
+        for b in breaks:
+            self.patch(b, end)
+        for c in continues:
+            self.patch(c, cond)
+
+    def visit_For(self, parent, node):
+        if not isinstance(node.init.id_, Id):
+            self.error("Unsupported loop variable")
+        slot = self.lookup(node.init.id_.value).slot
+        bound = self.allocate('integer').slot
+        self.expr(node, node.to)
+        self.emit(STORE, bound)
+        self.expr(node, node.init.expr)
+        self.emit(STORE, slot)
+        start = self.here()
+        self.emit(LOAD, slot)
+        self.emit(LOAD, bound)
+        exit_ = self.emit(JUMP_LT if node.reversed else JUMP_GT)
+        breaks, continues = self.loop(node, node.block)
+        step = self.here()
+        self.emit(DECR if node.reversed else INCR, slot)
+        self.emit(JUMP, start)
+        end = self.here()
+        self.patch(exit_, end)
+        for b in breaks:
+            self.patch(b, end)
+        for c in continues:
+            self.patch(c, step)
+
+    def visit_Break(self, parent, node):
+        if not self.loops:
+            self.error("Break outside of a loop")
+        self.loops[-1][0].append(self.emit(JUMP))
+
+    def visit_Continue(self, parent, node):
+        if not self.loops:
+            self.error("Continue outside of a loop")
+        self.loops[-1][1].append(self.emit(JUMP))
+
+    def visit_Exit(self, parent, node):
+        if node.expr is not None:
+            self.expr(node, node.expr)
+            if self.result is not None:
+                self.emit(STORE, self.result.slot)
+            else:
+                self.emit(POP)
+        self.emit(RETURN)
+
+    def call(self, node):
+        func = node.id_.value
+        args = node.args.args if node.args is not None else []
+        if func == 'write' or func == 'writeln':
+            for a in args:
+                self.write(node, a)
+            if func == 'writeln':
+                self.emit(CONST, self.bytecode.constant('\n'))
+                self.emit(WRITE, AS_STR)
+            return False
+        elif func == 'read' or func == 'readln':
+            for a in args:
+                self.read(node, a)
+            if func == 'readln':
+                self.emit(SKIP_LINE)
+            return False
+        elif func == 'chr':
+            self.expr(node, args[0])
+            self.emit(CHR)
+        elif func == 'ord':
+            self.expr(node, args[0])
+            self.emit(ORD)
+        elif func == 'strlen':
+            if isinstance(args[0], String):
+                self.emit(INT, len(args[0].value))
+            else:
+                self.emit(STRLEN, self.lookup(args[0].value).slot)
+        elif func == 'strcat':
+            self.expr(node, args[1])
+            self.emit(STRCAT, self.lookup(args[0].value).slot)
+            return False
+        elif func in self.routines:
+            index = self.routines[func]
+            for a in args:
+                self.expr(node, a)
+            self.emit(CALL, index)
+            return func in self.functions
+        else:
+            self.error("Unknown routine: {}".format(func))
+        return True
+
+    def write(self, parent, node):
+        if isinstance(node, (Boolean, Char)) and getattr(node, 'roundings', None) is None:
+            self.emit(CONST, self.bytecode.constant(str(node.value)))
+            self.emit(WRITE, AS_STR)
+            return
+
+        self.expr(parent, node)
+        roundings = getattr(node, 'roundings', None)
+        if roundings is not None:
+            pattern = '{:' + str(roundings[0].value) + '.' + str(roundings[1].value) + 'f}'
+            self.emit(FORMAT, self.bytecode.constant(pattern))
+            self.emit(WRITE, AS_STR)
+        elif isinstance(node, Id) and node.value not in self.routines:
+            var = self.lookup(node.value)
+            if (var.array or var.type_ == 'string') and var.type_ in ['char', 'string']:
+                self.emit(WRITE, AS_TEXT)
+            elif var.type_ == 'char' and not var.array:
+                self.emit(WRITE, AS_CHAR)
+            else:
+                self.emit(WRITE, AS_STR)
+        elif isinstance(node, ArrayElem) and self.lookup(node.id_.value).type_ == 'char':
+            self.emit(WRITE, AS_CHAR)
+        else:
+            self.emit(WRITE, AS_STR)
+
+    def read(self, parent, node):
+        if isinstance(node, ArrayElem):
+            var = self.lookup(node.id_.value)
+            self.index(node, var)
+            self.emit(READ, READERS.get(var.type_, 4))
+            self.emit(STORE_ELEM, var.slot)
+            return
+        var = self.lookup(node.value)
+        if var.array:
+            self.emit(READ_CHARS, var.slot)
+        elif var.type_ == 'string':
+            self.emit(READ_TEXT, var.slot)
+        else:
+            self.emit(READ, READERS.get(var.type_, 4))
+            self.emit(STORE, var.slot)
+
+    def load_const(self, value):
+        if type(value) is int:
+            self.emit(INT, value)
+        elif type(value) is float:
+            self.emit(REAL, self.bytecode.real(value))
+        else:
+            self.emit(CONST, self.bytecode.constant(value))
+
+    def expr(self, parent, node):
+        if isinstance(node, (FuncCall, ProcCall)):
+            if not self.call(node):
+                self.error("Routine has no value: {}".format(node.id_.value))
+            return
+        self.visit(parent, node)
+
+    def visit_Int(self, parent, node):
+        self.emit(INT, node.value)
+
+    def visit_Real(self, parent, node):
+        self.emit(REAL, self.bytecode.real(float(node.value)))
+
+    def visit_Boolean(self, parent, node):
+        self.emit(CONST, self.bytecode.constant(node.value == 'true'))
+
+    def visit_Char(self, parent, node):
+        self.emit(INT, ord(node.value))
+
+    def visit_String(self, parent, node):
+        self.emit(CONST, self.bytecode.constant(node.value))
+
+    def visit_Id(self, parent, node):
+        if node.value in self.routines and not any(node.value in scope for scope in self.scopes):
+            self.expr(parent, FuncCall(node, None))
+            return
+        self.emit(LOAD, self.lookup(node.value).slot)
+
+    def visit_ArrayElem(self, parent, node):
+        var = self.lookup(node.id_.value)
+        self.index(node, var)
+        self.emit(LOAD_ELEM, var.slot)
+
+    def visit_BinOp(self, parent, node):
+        self.expr(node, node.first)
+        short = node.op.short
+        if short is None:
+            self.expr(node, node.second)
+            self.emit(BINARY[node.symbol])
+            return
+        if short:
+            self.emit(NOT)
+        decided = self.emit(JUMP_FALSE)
+        self.expr(node, node.second)
+        self.emit(CONST, self.bytecode.constant(not short))
+        self.emit(BINARY[node.symbol])
+        end = self.emit(JUMP)
+        self.patch(decided, self.here())
+        self.emit(CONST, self.bytecode.constant(short))
+        self.patch(end, self.here())
+
+    def visit_UnOp(self, parent, node):
+        self.expr(node, node.first)
+        self.emit(NEG if node.symbol == '-' else NOT)
+
+    def error(self, text):
+        raise SystemExit(text)
+
+
+def disassemble(bytecode):
+    labels = {r.entry: r.name for r in bytecode.routines}
+    lines = []
+    code = bytecode.code
+    for pc in range(0, len(code), 2):
+        if pc in labels:
+            lines.append('{}:'.format(labels[pc]))
+        op, arg = code[pc], code[pc + 1]
+        name = OPCODES[op]
+        if op == CONST:
+            comment = repr(bytecode.constants[arg])
+        elif op == REAL:
+            comment = repr(bytecode.reals[arg])
+        elif op == CALL:
+            comment = bytecode.routines[arg].name
+        elif op == FORMAT:
+            comment = repr(bytecode.constants[arg])
+        else:
+            comment = None
+        line = '{:>6} {:<12} {}'.format(pc, name, '' if op in NO_ARG else arg)
+        if comment is not None:
+            line += '  ; ' + comment
+        lines.append(line.rstrip())
+    return '\n'.join(lines)
+
+
+def footprint(routine):
+    record = sys.getsizeof((0, [], routine, 0)) + 8
+    return sys.getsizeof(routine.template.copy()) + record
+
+
+class VM:
+    def __init__(self, bytecode, console=None, budget=BUDGET):
+        self.bytecode = bytecode
+        self.console = console or Console()
+        self.budget = budget
+
+    def run(self):
+        try:
+            self.dispatch()
+        finally:
+            self.console.flush()
+
+    def dispatch(self):
+        code = self.bytecode.code
+        reals = self.bytecode.reals
+        constants = self.bytecode.constants
+        routines = self.bytecode.routines
+        console = self.console
+        write = console.write
+        token = console.token
+
+        routine = self.bytecode.main
+        frame = routine.template.copy()
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        calls = []
+        pc = 0
+        sizes = [footprint(r) for r in routines]
+        budget = self.budget
+        used = footprint(routine)
+
+        while True:
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+            if op == LOAD:
+                push(frame[arg])
+            elif op == INT:
+                push(arg)
+            elif op == STORE:
+                frame[arg] = pop()
+            elif op == JUMP_GT:
+                b = pop()
+                if pop() > b:
+                    pc = arg
+            elif op == INCR:
+                frame[arg] += 1
+            elif op == JUMP:
+                pc = arg
+            elif op == JUMP_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == LOAD_ELEM:
+                stack[-1] = frame[arg][stack[-1]]
+            elif op == STORE_ELEM:
+                value = pop()
+                frame[arg][pop()] = value
+            elif op == ADD:
+                b = pop()
+                stack[-1] = stack[-1] + b
+            elif op == SUB:
+                b = pop()
+                stack[-1] = stack[-1] - b
+            elif op == MUL:
+                b = pop()
+                stack[-1] = stack[-1] * b
+            elif op == EQ:
+                b = pop()
+                stack[-1] = stack[-1] == b
+            elif op == LT:
+                b = pop()
+                stack[-1] = stack[-1] < b
+            elif op == GT:
+                b = pop()
+                stack[-1] = stack[-1] > b
+            elif op == MOD:
+                b = pop()
+                stack[-1] = stack[-1] % b
+            elif op == IDIV:
+                b = pop()
+                stack[-1] = int(stack[-1]) // int(b)
+            elif op == LE:
+                b = pop()
+                stack[-1] = stack[-1] <= b
+            elif op == GE:
+                b = pop()
+                stack[-1] = stack[-1] >= b
+            elif op == NE:
+                b = pop()
+                stack[-1] = stack[-1] != b
+            elif op == CALL:
+                callee = routines[arg]
+                new = callee.template.copy()
+                params = callee.params
+                if params:
+                    n = len(params)
+                    values = stack[-n:]
+                    del stack[-n:]
+                    for i in range(n):
+                        new[params[i]] = values[i]
+                calls.append((pc, frame, routine, used))
+                used += sizes[arg]
+                if used > budget:
+                    raise SystemExit("Stack overflow: {} nested calls exceed {} bytes".format(len(calls), budget))
+                pc = callee.entry
+                frame = new
+                routine = callee
+            elif op == RETURN:
+                if not calls:
+                    break
+                result = routine.result
+                if result is not None:
+                    push(frame[result])
+                pc, frame, routine, used = calls.pop()
+            elif op == JUMP_LT:
+                b = pop()
+                if pop() < b:
+                    pc = arg
+            elif op == DECR:
+                frame[arg] -= 1
+            elif op == DIV:
+                b = pop()
+                stack[-1] = stack[-1] / b
+            elif op == AND:
+                b = pop()
+                stack[-1] = stack[-1] != 0 and b != 0
+            elif op == OR:
+                b = pop()
+                stack[-1] = stack[-1] != 0 or b != 0
+            elif op == XOR:
+                b = pop()
+                stack[-1] = (stack[-1] != 0) != (b != 0)
+            elif op == NEG:
+                stack[-1] = -stack[-1]
+            elif op == NOT:
+                stack[-1] = not (stack[-1] != 0)
+            elif op == CONST:
+                push(constants[arg])
+            elif op == REAL:
+                push(reals[arg])
+            elif op == POP:
+                pop()
+            elif op == WRITE:
+                value = pop()
+                if arg == AS_STR:
+                    write(str(value))
+                elif arg == AS_CHAR:
+                    write(char(value))
+                else:
+                    write(text(value))
+            elif op == FORMAT:
+                stack[-1] = constants[arg].format(stack[-1])
+            elif op == READ:
+                word = token()
+                if arg == 0:
+                    push(int(word))
+                elif arg == 1:
+                    push(float(word))
+                elif arg == 2:
+                    push(ord(word[0]))
+                elif arg == 3:
+                    push(word.lower() == 'true')
+                else:
+                    push(word)
+            elif op == READ_TEXT:
+                frame[arg].extend([ord(c) for c in token()])
+            elif op == READ_CHARS:
+                codes = [ord(c) for c in token()]
+                frame[arg][:len(codes)] = codes
+            elif op == SKIP_LINE:
+                console.skip_line()
+            elif op == CHR:
+                stack[-1] = chr(stack[-1])
+            elif op == ORD:
+                stack[-1] = ordinal(stack[-1])
+            elif op == STRLEN:
+                push(len(text(frame[arg])))
+            elif op == STRCAT:
+                source = pop()
+                if isinstance(source, str):
+                    codes = [ord(c) for c in source]
+                else:
+                    codes = [c for c in source if c]
+                concat(frame[arg], codes)
+            elif op == NEW:
+                default = pop()
+                stack[-1] = [default] * stack[-1]
+            elif op == BUILD:
+                values = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                push(values)
+            elif op == PAD:
+                default = pop()
+                length = pop()
+                values = stack[-1]
+                values.extend([default] * (length - len(values)))
+            else:
+                raise SystemExit("Unknown opcode: {}".format(op))